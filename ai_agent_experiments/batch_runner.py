@@ -0,0 +1,282 @@
+"""
+Run an agent over a JSONL file of queries.
+
+Each input line is {"id": ..., "query": ...} (the id defaults to the line number). Results are appended
+to the output JSONL file as they finish, one line per input item:
+    {"id", "query", "answer", "error", "prompt_tokens", "completion_tokens", "seconds", "duplicate_of"}
+
+The output file doubles as the checkpoint: a job that is killed and restarted with the same files skips
+every item that already has an answer, and only retries items that failed. Queries that are identical
+(ignoring case and whitespace) are run once; later copies reuse the answer and record `duplicate_of`.
+When an item was retried, its last line is the one that counts.
+
+Usage:
+    python -m ai_agent_experiments.batch_runner queries.jsonl results.jsonl --agent research --concurrency 8
+"""
+import argparse
+import asyncio
+import contextlib
+import contextvars
+import json
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional
+
+import httpx
+from openai import AsyncAzureOpenAI, DefaultAsyncHttpxClient
+
+from ai_agent_experiments.config import Configuration, get_configuration
+
+Agent = Callable[[str], Awaitable[str]]
+
+RAG_SYSTEM_PROMPT = ("You answer questions based on the context provided. "
+                     "If the answer is not in the context, you say you don't know.")
+
+
+@dataclass
+class Usage:
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    requests: int = 0
+
+    def add(self, other: "Usage") -> None:
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.requests += other.requests
+
+
+# Usage of the item the current task is working on; set per item by run_batch
+_current_usage: contextvars.ContextVar[Optional[Usage]] = contextvars.ContextVar("batch_usage", default=None)
+
+
+async def _record_usage(response: httpx.Response) -> None:
+    usage = _current_usage.get()
+    # Streamed responses are left alone: reading them here would consume the stream
+    if usage is None or not response.headers.get("content-type", "").startswith("application/json"):
+        return
+    await response.aread()
+    try:
+        reported = response.json().get("usage") or {}
+    except ValueError:
+        return
+    usage.prompt_tokens += reported.get("prompt_tokens", 0)
+    usage.completion_tokens += reported.get("completion_tokens", 0)
+    usage.requests += 1
+
+
+def metered_openai_client(config: Configuration) -> AsyncAzureOpenAI:
+    """An AsyncAzureOpenAI client whose token usage is attributed to the batch item being run."""
+    azure = config.azure_open_ai_config
+    http_client = DefaultAsyncHttpxClient(event_hooks={"response": [_record_usage]})
+    return AsyncAzureOpenAI(api_key=azure["api_key"], azure_endpoint=azure["azure_endpoint"],
+                            api_version=azure["api_version"], http_client=http_client)
+
+
+@dataclass
+class BatchSummary:
+    processed: int = 0
+    duplicates: int = 0
+    resumed: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+    usage: Usage = field(default_factory=Usage)
+    latencies: list[float] = field(default_factory=list)
+
+    def report(self, prompt_price: float = 0.0, completion_price: float = 0.0) -> str:
+        """Human-readable summary; prices are per million tokens."""
+        completed = self.processed + self.duplicates
+        cost = (self.usage.prompt_tokens * prompt_price + self.usage.completion_tokens * completion_price) / 1e6
+        lines = [
+            f"items:      {completed} completed ({self.processed} run, {self.duplicates} duplicates), "
+            f"{self.failed} failed, {self.resumed} already done",
+            f"throughput: {completed / self.seconds if self.seconds else 0:.1f} items/sec over {self.seconds:.1f}s",
+            f"tokens:     {self.usage.prompt_tokens} prompt + {self.usage.completion_tokens} completion "
+            f"in {self.usage.requests} requests",
+            f"cost:       ${cost:.4f} (${cost / self.processed if self.processed else 0:.6f} per run item)",
+        ]
+        if len(self.latencies) >= 2:
+            quantiles = statistics.quantiles(self.latencies, n=100)
+            lines.append(f"latency:    p50 {quantiles[49]:.2f}s, p95 {quantiles[94]:.2f}s")
+        return "\n".join(lines)
+
+
+def query_key(query: str) -> str:
+    return " ".join(query.split()).lower()
+
+
+def load_checkpoint(output_path: str) -> tuple[set[str], dict[str, tuple[str, str]]]:
+    """
+    Read an existing output file: returns (ids with an answer, query key -> (id, answer)).
+    A torn last line left by a killed job is cut off so new results start on a fresh line.
+    """
+    done_ids, answers = set(), {}
+    if not os.path.exists(output_path):
+        return done_ids, answers
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        complete = data.rfind(b"\n") + 1
+        if complete < len(data):
+            f.truncate(complete)
+    for line in data[:complete].decode("utf-8").splitlines():
+        record = json.loads(line)
+        if record.get("error") is None:
+            done_ids.add(record["id"])
+            answers.setdefault(query_key(record["query"]), (record.get("duplicate_of") or record["id"], record["answer"]))
+        else:
+            done_ids.discard(record["id"])
+    return done_ids, answers
+
+
+def iter_queries(input_path: str) -> Iterator[tuple[str, str]]:
+    """Stream (id, query) pairs from a JSONL file without loading it all."""
+    with open(input_path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if line.strip():
+                item = json.loads(line)
+                yield str(item.get("id", line_number)), item["query"]
+
+
+async def run_batch(agent: Agent, input_path: str, output_path: str, concurrency: int = 8) -> BatchSummary:
+    """Run `agent` over every query in `input_path` with at most `concurrency` queries in flight."""
+    done_ids, answers = load_checkpoint(output_path)
+    summary = BatchSummary()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency * 2)
+    # Query key -> (id, future of (answer, error)) for queries being run right now
+    in_flight: dict[str, tuple[str, asyncio.Future]] = {}
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as out:
+        def write(item_id: str, query: str, answer: Optional[str], error: Optional[str], usage: Usage,
+                  seconds: float, duplicate_of: Optional[str] = None) -> None:
+            out.write(json.dumps({"id": item_id, "query": query, "answer": answer, "error": error,
+                                  "prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens,
+                                  "seconds": round(seconds, 3), "duplicate_of": duplicate_of},
+                                 ensure_ascii=False) + "\n")
+            # Flushed per item so a killed job loses at most the items still in flight
+            out.flush()
+
+        async def process(item_id: str, query: str) -> None:
+            key = query_key(query)
+            if key in answers:
+                first_id, answer = answers[key]
+                write(item_id, query, answer, None, Usage(), 0.0, duplicate_of=first_id)
+                summary.duplicates += 1
+                return
+            if key in in_flight:
+                first_id, future = in_flight[key]
+                answer, error = await future
+                write(item_id, query, answer, error, Usage(), 0.0, duplicate_of=first_id)
+                if error is None:
+                    summary.duplicates += 1
+                else:
+                    summary.failed += 1
+                return
+
+            future = loop.create_future()
+            in_flight[key] = (item_id, future)
+            usage = Usage()
+            _current_usage.set(usage)
+            item_start = time.perf_counter()
+            try:
+                answer, error = await agent(query), None
+            except Exception as e:
+                answer, error = None, f"{type(e).__name__}: {e}"
+            seconds = time.perf_counter() - item_start
+            del in_flight[key]
+            future.set_result((answer, error))
+            write(item_id, query, answer, error, usage, seconds)
+            summary.usage.add(usage)
+            if error is None:
+                answers[key] = (item_id, answer)
+                summary.processed += 1
+                summary.latencies.append(seconds)
+            else:
+                summary.failed += 1
+
+        async def worker() -> None:
+            while (item := await queue.get()) is not None:
+                await process(*item)
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        try:
+            for item_id, query in iter_queries(input_path):
+                if item_id in done_ids:
+                    summary.resumed += 1
+                else:
+                    await queue.put((item_id, query))
+            for _ in workers:
+                await queue.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+    summary.seconds = time.perf_counter() - start
+    return summary
+
+
+@contextlib.asynccontextmanager
+async def make_agent(name: str, config: Configuration, client: AsyncAzureOpenAI) -> AsyncIterator[Agent]:
+    """Build a per-query agent function sharing `client`, and close what it opened afterwards."""
+    if name == "research":
+        from ai_agent_experiments.lesson_01_basic_azure_openai import ResearchAgent
+
+        research_agent = ResearchAgent(config, async_client=client)
+        async with httpx.AsyncClient(timeout=30.0) as http:
+            yield lambda query: research_agent.arun(query, http)
+    elif name == "chatbot":
+        from ai_agent_experiments.chat_server import McpClientPool, default_mcp_client
+        from ai_agent_experiments.lesson_04_tool_calling_mcp import ChatBot
+
+        mcp_pool = McpClientPool(default_mcp_client, 1)
+        await mcp_pool.connect()
+        try:
+            # Every query is its own conversation; the router (if enabled) is shared
+            tool_router = ChatBot(config, client=client, mcp_client=mcp_pool).tool_router
+            yield lambda query: ChatBot(config, client=client, mcp_client=mcp_pool, tool_router=tool_router).run(query)
+        finally:
+            await mcp_pool.disconnect()
+    elif name == "rag":
+        from ai_agent_experiments.context_packing import pack_context, rag_messages
+        from ai_agent_experiments.faiss_store import PersistentFaissStore
+
+        store = PersistentFaissStore(config)
+        embedding_model = config.faiss_server_config["embedding_model"]
+        model = config.azure_open_ai_config["model"]
+
+        async def rag(query: str) -> str:
+            embedding = await client.embeddings.create(input=[query], model=embedding_model)
+            context = pack_context(store, embedding.data[0])
+            messages = rag_messages([{"role": "system", "content": RAG_SYSTEM_PROMPT}], query, context.text)
+            response = await client.chat.completions.create(model=model, messages=messages)
+            return response.choices[0].message.content
+
+        yield rag
+    else:
+        raise ValueError(f"Unknown agent {name!r}")
+
+
+async def main(args: argparse.Namespace) -> BatchSummary:
+    config = get_configuration(args.config)
+    client = metered_openai_client(config)
+    try:
+        async with make_agent(args.agent, config, client) as agent:
+            return await run_batch(agent, args.input, args.output, args.concurrency)
+    finally:
+        await client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run an agent over a JSONL file of queries, resuming where it left off")
+    parser.add_argument("input", help="JSONL file with one {\"id\": ..., \"query\": ...} object per line")
+    parser.add_argument("output", help="JSONL file results are appended to; also the checkpoint")
+    parser.add_argument("--agent", choices=["research", "chatbot", "rag"], default="research")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--config", default="./config.json")
+    parser.add_argument("--prompt-price", type=float, default=0.0, help="USD per million prompt tokens")
+    parser.add_argument("--completion-price", type=float, default=0.0, help="USD per million completion tokens")
+    arguments = parser.parse_args()
+    batch_summary = asyncio.run(main(arguments))
+    print(batch_summary.report(arguments.prompt_price, arguments.completion_price))
@@ -0,0 +1,278 @@
+"""
+HTTP/WebSocket front-end hosting many concurrent ChatBot conversations.
+
+Every conversation has its own message history, but all of them share one AsyncAzureOpenAI client
+(and so one HTTP connection pool) and a small pool of MCP connections. Sessions that stay idle for
+`idle_timeout` seconds are evicted.
+
+Endpoints:
+    POST   /sessions                      start a conversation, returns {"session_id": ...}
+    POST   /sessions/{id}/messages        {"message": "..."}; the answer is streamed back as plain text
+    DELETE /sessions/{id}                 end a conversation
+    WS     /sessions/{id}/ws              send messages as text; receives {"type": "delta" | "done" | "error"}
+    GET    /health                        session and turn counts
+
+A session runs one turn at a time (409 while a turn is in progress) and at most `max_active_turns`
+turns run across all sessions; beyond that new turns are refused with 503 instead of queueing up.
+"""
+import asyncio
+import contextlib
+import itertools
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, List, Optional
+
+from openai import AsyncAzureOpenAI
+
+from ai_agent_experiments.config import Configuration
+from ai_agent_experiments.lesson_04_tool_calling_mcp import ChatBot
+from ai_agent_experiments.mcp_stdio_client import McpStdioClient
+
+
+@dataclass
+class ChatServerSettings:
+    idle_timeout: float = 15 * 60
+    max_sessions: int = 10_000
+    max_active_turns: int = 64
+    mcp_pool_size: int = 2
+    # Seconds between sweeps for idle sessions
+    eviction_interval: float = 30.0
+
+
+def default_mcp_client(index: int) -> McpStdioClient:
+    return McpStdioClient(f"research-server-{index}", "poetry", ["run", "python", "-m", "tools.research_server"])
+
+
+class McpClientPool:
+    """
+    A fixed set of MCP connections shared by all sessions. MCP sessions multiplex concurrent requests,
+    so calls are simply spread round-robin. Exposes the same interface ChatBot uses on a single client.
+    """
+
+    def __init__(self, factory: Callable[[int], McpStdioClient], size: int) -> None:
+        self._clients = [factory(i) for i in range(size)]
+        self._next = itertools.cycle(self._clients)
+
+    async def connect(self) -> None:
+        # MCP clients must be connected and disconnected from the same task, so connect them in turn
+        for client in self._clients:
+            await client.connect()
+
+    async def disconnect(self) -> None:
+        for client in reversed(self._clients):
+            await client.disconnect()
+
+    async def get_available_tools(self) -> List:
+        return await self._clients[0].get_available_tools()
+
+    async def use_tool(self, tool_name: str, tool_args: dict) -> str:
+        return await next(self._next).use_tool(tool_name, tool_args)
+
+
+@dataclass
+class ChatSession:
+    bot: ChatBot
+    last_used: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+class SessionBusyError(Exception):
+    """The session is already running a turn."""
+
+
+class ServerOverloadedError(Exception):
+    """Too many turns are running, or too many sessions are open."""
+
+
+class SessionManager:
+    def __init__(self, make_bot: Callable[[], ChatBot], settings: ChatServerSettings) -> None:
+        self._make_bot = make_bot
+        self.settings = settings
+        self._sessions: dict[str, ChatSession] = {}
+        self._turns = asyncio.Semaphore(settings.max_active_turns)
+        self.active_turns = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self) -> str:
+        if len(self._sessions) >= self.settings.max_sessions and not self.evict_idle():
+            raise ServerOverloadedError("Too many open sessions")
+        session_id = uuid.uuid4().hex
+        self._sessions[session_id] = ChatSession(self._make_bot())
+        return session_id
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        return self._sessions.get(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        """Drop sessions idle for longer than `idle_timeout`; returns how many were dropped."""
+        cutoff = time.monotonic() - self.settings.idle_timeout
+        idle = [session_id for session_id, session in self._sessions.items()
+                if session.last_used < cutoff and not session.lock.locked()]
+        for session_id in idle:
+            del self._sessions[session_id]
+        return len(idle)
+
+    async def run_evictor(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.eviction_interval)
+            self.evict_idle()
+
+    async def begin_turn(self, session: ChatSession) -> None:
+        """Claim the session and a global turn slot, failing fast rather than waiting for either."""
+        if session.lock.locked():
+            raise SessionBusyError("A message is already being answered in this session")
+        if self._turns.locked():
+            raise ServerOverloadedError("Too many conversations are active, try again shortly")
+        # Neither acquire can wait after the checks above
+        await session.lock.acquire()
+        await self._turns.acquire()
+        self.active_turns += 1
+
+    def end_turn(self, session: ChatSession) -> None:
+        self.active_turns -= 1
+        session.last_used = time.monotonic()
+        self._turns.release()
+        session.lock.release()
+
+    @contextlib.asynccontextmanager
+    async def turn(self, session: ChatSession) -> AsyncIterator[ChatBot]:
+        await self.begin_turn(session)
+        try:
+            yield session.bot
+        finally:
+            self.end_turn(session)
+
+
+def create_app(config: Configuration, settings: Optional[ChatServerSettings] = None,
+               mcp_client_factory: Callable[[int], McpStdioClient] = default_mcp_client):
+    """Build the Starlette app; the OpenAI client and MCP pool are opened and closed with the app."""
+    from starlette.applications import Starlette
+    from starlette.background import BackgroundTask
+    from starlette.requests import Request
+    from starlette.responses import JSONResponse, Response, StreamingResponse
+    from starlette.routing import Route, WebSocketRoute
+    from starlette.websockets import WebSocket, WebSocketDisconnect
+
+    settings = settings or ChatServerSettings()
+    azure = config.azure_open_ai_config
+    client = AsyncAzureOpenAI(api_key=azure["api_key"], azure_endpoint=azure["azure_endpoint"],
+                              api_version=azure["api_version"])
+    mcp_pool = McpClientPool(mcp_client_factory, settings.mcp_pool_size)
+    # One tool router for all sessions, so tool embeddings are computed and cached once
+    tool_router = ChatBot(config, client=client, mcp_client=mcp_pool).tool_router
+    sessions = SessionManager(lambda: ChatBot(config, client=client, mcp_client=mcp_pool, tool_router=tool_router),
+                              settings)
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette):
+        await mcp_pool.connect()
+        evictor = asyncio.create_task(sessions.run_evictor())
+        try:
+            yield
+        finally:
+            evictor.cancel()
+            await mcp_pool.disconnect()
+            await client.close()
+
+    def error(status: int, message: str) -> JSONResponse:
+        headers = {"Retry-After": "1"} if status == 503 else None
+        return JSONResponse({"error": message}, status_code=status, headers=headers)
+
+    async def create_session(request: Request) -> Response:
+        try:
+            return JSONResponse({"session_id": sessions.create()}, status_code=201)
+        except ServerOverloadedError as e:
+            return error(503, str(e))
+
+    async def delete_session(request: Request) -> Response:
+        if not sessions.delete(request.path_params["session_id"]):
+            return error(404, "Unknown session")
+        return Response(status_code=204)
+
+    async def post_message(request: Request) -> Response:
+        session = sessions.get(request.path_params["session_id"])
+        if session is None:
+            return error(404, "Unknown session")
+        try:
+            body = await request.json()
+        except ValueError:
+            body = None
+        message = body.get("message") if isinstance(body, dict) else None
+        if not isinstance(message, str) or not message:
+            return error(400, "Expected a JSON body with a non-empty 'message'")
+        # Begin the turn here so busy and overloaded sessions get a status code, not a broken stream
+        try:
+            await sessions.begin_turn(session)
+        except (SessionBusyError, ServerOverloadedError) as e:
+            return error(409 if isinstance(e, SessionBusyError) else 503, str(e))
+        ended = False
+
+        def end_turn() -> None:
+            # Runs when the stream finishes, and again as a background task in case the client
+            # disconnected before the stream started
+            nonlocal ended
+            if not ended:
+                ended = True
+                sessions.end_turn(session)
+
+        async def stream() -> AsyncIterator[str]:
+            # aclosing: if the client goes away, the bot rolls the turn back before the session is released
+            try:
+                async with contextlib.aclosing(session.bot.run_stream(message)) as deltas:
+                    async for delta in deltas:
+                        yield delta
+            finally:
+                end_turn()
+
+        return StreamingResponse(stream(), media_type="text/plain; charset=utf-8", background=BackgroundTask(end_turn))
+
+    async def websocket_chat(websocket: WebSocket) -> None:
+        session = sessions.get(websocket.path_params["session_id"])
+        if session is None:
+            await websocket.close(code=4404)
+            return
+        await websocket.accept()
+        try:
+            while True:
+                message = await websocket.receive_text()
+                try:
+                    async with sessions.turn(session) as bot, contextlib.aclosing(bot.run_stream(message)) as deltas:
+                        async for delta in deltas:
+                            await websocket.send_json({"type": "delta", "content": delta})
+                    await websocket.send_json({"type": "done"})
+                except (SessionBusyError, ServerOverloadedError) as e:
+                    await websocket.send_json({"type": "error", "error": str(e)})
+                except WebSocketDisconnect:
+                    raise
+                except Exception as e:
+                    # The bot has rolled the turn back, so the conversation can go on
+                    await websocket.send_json({"type": "error", "error": f"The message could not be answered: {e}"})
+        except WebSocketDisconnect:
+            pass
+
+    async def health(request: Request) -> Response:
+        return JSONResponse({"sessions": len(sessions), "active_turns": sessions.active_turns})
+
+    app = Starlette(routes=[
+        Route("/sessions", create_session, methods=["POST"]),
+        Route("/sessions/{session_id}", delete_session, methods=["DELETE"]),
+        Route("/sessions/{session_id}/messages", post_message, methods=["POST"]),
+        WebSocketRoute("/sessions/{session_id}/ws", websocket_chat),
+        Route("/health", health),
+    ], lifespan=lifespan)
+    app.state.sessions = sessions
+    return app
+
+
+async def serve(config: Configuration, host: str = "127.0.0.1", port: int = 8080,
+                settings: Optional[ChatServerSettings] = None) -> None:
+    import uvicorn
+
+    app = create_app(config, settings)
+    await uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="info")).serve()
@@ -0,0 +1,116 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from typing import Optional
+
+from langchain_core.messages import AnyMessage, messages_from_dict, messages_to_dict
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id  TEXT PRIMARY KEY,
+    parent_id  TEXT REFERENCES threads(thread_id),
+    fork_step  INTEGER,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS steps (
+    thread_id TEXT NOT NULL REFERENCES threads(thread_id),
+    step      INTEGER NOT NULL,
+    node      TEXT NOT NULL,
+    messages  TEXT NOT NULL,
+    PRIMARY KEY (thread_id, step)
+);
+"""
+
+
+class MessageCheckpointStore:
+    """
+    SQLite checkpoint store for LangGraphAgent conversations.
+
+    Each graph step stores only the messages that step added, so writing a checkpoint costs the
+    same no matter how long the conversation is. A thread's history is rebuilt by replaying its
+    steps. Forking a thread at a step only records the parent and the step, so forks are cheap
+    and share the parent's rows.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def _ensure_thread(self, thread_id: str) -> None:
+        self._conn.execute("INSERT OR IGNORE INTO threads (thread_id, created_at) VALUES (?, ?)",
+                           (thread_id, time.time()))
+
+    def _thread(self, thread_id: str) -> Optional[tuple[Optional[str], Optional[int]]]:
+        row = self._conn.execute("SELECT parent_id, fork_step FROM threads WHERE thread_id = ?",
+                                 (thread_id,)).fetchone()
+        return None if row is None else (row[0], row[1])
+
+    def last_step(self, thread_id: str) -> int:
+        """Number of the latest step of a thread, counting steps inherited from a fork; -1 if empty."""
+        thread = self._thread(thread_id)
+        if thread is None:
+            return -1
+        row = self._conn.execute("SELECT MAX(step) FROM steps WHERE thread_id = ?", (thread_id,)).fetchone()
+        if row[0] is not None:
+            return row[0]
+        return thread[1] if thread[1] is not None else -1
+
+    def append_step(self, thread_id: str, node: str, messages: list[AnyMessage]) -> int:
+        """Store the messages one graph step added and return the step number."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._ensure_thread(thread_id)
+            step = self.last_step(thread_id) + 1
+            self._conn.execute("INSERT INTO steps (thread_id, step, node, messages) VALUES (?, ?, ?, ?)",
+                               (thread_id, step, node, json.dumps(messages_to_dict(messages))))
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+        return step
+
+    def load_messages(self, thread_id: str, upto_step: Optional[int] = None) -> list[AnyMessage]:
+        """Rebuild the message history of a thread up to and including `upto_step` (default: all)."""
+        # Walk up the fork chain first, then replay from the root down
+        chain = []
+        current, limit = thread_id, upto_step
+        while current is not None:
+            thread = self._thread(current)
+            if thread is None:
+                break
+            chain.append((current, limit))
+            parent_id, fork_step = thread
+            if parent_id is not None:
+                limit = fork_step if limit is None else min(limit, fork_step)
+            current = parent_id
+
+        messages: list[AnyMessage] = []
+        for current, limit in reversed(chain):
+            rows = self._conn.execute(
+                "SELECT messages FROM steps WHERE thread_id = ? AND step <= ? ORDER BY step",
+                (current, limit if limit is not None else 2 ** 62),
+            ).fetchall()
+            for (payload,) in rows:
+                messages.extend(messages_from_dict(json.loads(payload)))
+        return messages
+
+    def steps(self, thread_id: str) -> list[tuple[int, str]]:
+        """(step, node) pairs stored directly on this thread, e.g. to choose a step to fork from."""
+        return self._conn.execute("SELECT step, node FROM steps WHERE thread_id = ? ORDER BY step",
+                                  (thread_id,)).fetchall()
+
+    def fork(self, thread_id: str, step: int, new_thread_id: Optional[str] = None) -> str:
+        """Start a new thread whose history is `thread_id` up to `step`; returns the new thread id."""
+        new_thread_id = new_thread_id or uuid.uuid4().hex
+        self._conn.execute("INSERT INTO threads (thread_id, parent_id, fork_step, created_at) VALUES (?, ?, ?, ?)",
+                           (new_thread_id, thread_id, step, time.time()))
+        return new_thread_id
+
+    def close(self) -> None:
+        self._conn.close()
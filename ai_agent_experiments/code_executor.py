@@ -0,0 +1,325 @@
+import contextlib
+import io
+import multiprocessing
+import os
+import queue
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+
+from ai_agent_experiments.utils import extract_execute_python_code
+
+# Attempts at starting a replacement worker before the pool gives up on that slot
+REPLACE_ATTEMPTS = 3
+
+# Files with these extensions that a snippet writes to its working directory are returned as charts
+CHART_EXTENSIONS = (".png", ".jpg", ".jpeg", ".svg", ".pdf", ".webp")
+
+
+@dataclass
+class ExecutionLimits:
+    """Resource limits applied to every snippet run in a worker."""
+
+    cpu_seconds: int = 30
+    """CPU time a single run may use before the worker is killed (RLIMIT_CPU)."""
+
+    memory_mb: int | None = 1024
+    """Extra address space a worker may allocate on top of its warm state (RLIMIT_AS)."""
+
+    wall_seconds: float = 60.0
+    """Wall-clock time to wait for a run before killing the worker."""
+
+
+@dataclass
+class ExecutionResult:
+    ok: bool
+    stdout: str
+    error: str | None = None
+    files: list[str] = field(default_factory=list)
+    elapsed_s: float = 0.0
+
+
+def _address_space_bytes() -> int | None:
+    # Current virtual memory size of this process (Linux only)
+    try:
+        with open("/proc/self/status", "r") as status:
+            for line in status:
+                if line.startswith("VmSize:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+def _apply_memory_limit(memory_mb: int | None) -> None:
+    if memory_mb is None:
+        return
+    try:
+        import resource
+    except ImportError:
+        return  # not a POSIX platform; rely on the wall-clock limit only
+    baseline = _address_space_bytes() or 0
+    limit = baseline + memory_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _set_cpu_budget(cpu_seconds: int) -> None:
+    # RLIMIT_CPU counts the whole process lifetime, so move the soft limit forward before every run
+    try:
+        import resource
+    except ImportError:
+        return
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    soft = int(usage.ru_utime + usage.ru_stime) + cpu_seconds
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+
+def _warm_up(csv_path: str | None) -> dict:
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    from ai_agent_experiments.utils import load_and_prepare_data
+
+    df = load_and_prepare_data(csv_path) if csv_path else None
+    return {"pd": pd, "plt": plt, "df": df}
+
+
+def _worker_main(conn, csv_path: str | None, limits: ExecutionLimits) -> None:
+    """Worker process: import pandas/matplotlib and load the DataFrame once, then run snippets until told to stop."""
+    warm = _warm_up(csv_path)
+    _apply_memory_limit(limits.memory_mb)
+    conn.send("ready")
+    while True:
+        message = conn.recv()
+        if message is None:
+            break
+        code, workdir = message
+        _set_cpu_budget(limits.cpu_seconds)
+        output = io.StringIO()
+        error = None
+        previous_cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            # A deep copy, so neither new columns nor in-place writes (df.loc[...] = ...) leak into later runs
+            df = warm["df"].copy(deep=True) if warm["df"] is not None else None
+            exec_globals = {"__name__": "__main__", "df": df, "pd": warm["pd"], "plt": warm["plt"]}
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+                exec(compile(code, "<execute_python>", "exec"), exec_globals)
+        except BaseException:
+            error = traceback.format_exc()
+        finally:
+            warm["plt"].close("all")
+            os.chdir(previous_cwd)
+        conn.send((output.getvalue(), error))
+
+
+class _Worker:
+    def __init__(self, ctx, csv_path: str | None, limits: ExecutionLimits) -> None:
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, csv_path, limits), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+
+    def wait_ready(self) -> None:
+        if self.conn.recv() != "ready":
+            raise RuntimeError("Worker failed to start")
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+            self.process.join(timeout=5)
+        except (BrokenPipeError, EOFError, OSError):
+            pass
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.kill()
+        self.process.join(timeout=5)
+        self.conn.close()
+
+
+class PythonExecutionPool:
+    """
+    Pool of pre-warmed worker processes for running model-generated <execute_python> code.
+
+    Each worker has pandas, matplotlib (Agg backend) and the prepared DataFrame `df` loaded before it
+    accepts work. Every run happens in a fresh temporary directory under CPU, memory and wall-clock
+    limits; charts written there are moved to a new `run_*` subdirectory of `output_dir`, so runs
+    saving the same filename do not overwrite each other. Workers that crash, time out or reach
+    `max_runs_per_worker` are replaced in the background. `run` raises if no worker becomes idle within
+    `acquire_timeout` seconds, e.g. because replacements keep failing to start.
+    """
+
+    def __init__(self, csv_path: str | None = None, size: int = 2, max_runs_per_worker: int = 50,
+                 limits: ExecutionLimits | None = None, output_dir: str = ".", acquire_timeout: float = 120.0) -> None:
+        self.csv_path = csv_path
+        self.size = size
+        self.max_runs_per_worker = max_runs_per_worker
+        self.limits = limits or ExecutionLimits()
+        self.output_dir = output_dir
+        self.acquire_timeout = acquire_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle: queue.Queue[_Worker] = queue.Queue()
+        self._closed = False
+        # Last exception raised while starting a replacement worker, reported by run()
+        self._replace_error: BaseException | None = None
+
+    def start(self) -> None:
+        workers = [_Worker(self._ctx, self.csv_path, self.limits) for _ in range(self.size)]
+        for worker in workers:
+            worker.wait_ready()
+            self._idle.put(worker)
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> "PythonExecutionPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _replace(self, worker: _Worker, graceful: bool, workdir: str | None = None) -> None:
+        worker.stop() if graceful else worker.kill()
+        if workdir is not None:
+            # Removed only once the worker has exited, as it may have been writing into it until then
+            shutil.rmtree(workdir, ignore_errors=True)
+        for _ in range(REPLACE_ATTEMPTS):
+            if self._closed:
+                return
+            replacement = None
+            try:
+                replacement = _Worker(self._ctx, self.csv_path, self.limits)
+                replacement.wait_ready()
+            except Exception as e:
+                # Runs in a daemon thread: record the failure for run() instead of losing it with the slot
+                self._replace_error = e
+                if replacement is not None:
+                    replacement.kill()
+                continue
+            self._idle.put(replacement)
+            return
+
+    def _replace_in_background(self, worker: _Worker, graceful: bool, workdir: str | None = None) -> None:
+        threading.Thread(target=self._replace, args=(worker, graceful, workdir), daemon=True).start()
+
+    def _collect_charts(self, workdir: str) -> list[str]:
+        names = [name for name in sorted(os.listdir(workdir)) if name.lower().endswith(CHART_EXTENSIONS)]
+        if not names:
+            return []
+        os.makedirs(self.output_dir, exist_ok=True)
+        run_dir = tempfile.mkdtemp(prefix="run_", dir=self.output_dir)
+        files = []
+        for name in names:
+            destination = os.path.abspath(os.path.join(run_dir, name))
+            shutil.move(os.path.join(workdir, name), destination)
+            files.append(destination)
+        return files
+
+    def run(self, code: str) -> ExecutionResult:
+        """Run a snippet (plain code or an <execute_python> block) on an idle warm worker."""
+        if "<execute_python>" in code:
+            code = extract_execute_python_code(code)
+        try:
+            worker = self._idle.get(timeout=self.acquire_timeout)
+        except queue.Empty:
+            reason = f"; replacing a worker failed: {self._replace_error!r}" if self._replace_error else ""
+            raise RuntimeError(f"No idle worker after {self.acquire_timeout}s{reason}") from self._replace_error
+        workdir = tempfile.mkdtemp(prefix="execute_python_")
+        start = time.perf_counter()
+        try:
+            worker.conn.send((code, workdir))
+            if not worker.conn.poll(self.limits.wall_seconds):
+                # The worker may still be writing into workdir; the replacement thread removes it after the kill
+                self._replace_in_background(worker, graceful=False, workdir=workdir)
+                workdir = None
+                return ExecutionResult(ok=False, stdout="", elapsed_s=time.perf_counter() - start,
+                                       error=f"Timed out after {self.limits.wall_seconds}s")
+            try:
+                stdout, error = worker.conn.recv()
+            except EOFError:
+                # The worker was killed, e.g. by SIGXCPU or the memory limit
+                self._replace_in_background(worker, graceful=False, workdir=workdir)
+                workdir = None
+                return ExecutionResult(ok=False, stdout="", elapsed_s=time.perf_counter() - start,
+                                       error=f"Worker died (exit code {worker.process.exitcode})")
+            elapsed = time.perf_counter() - start
+            worker.runs += 1
+            if worker.runs >= self.max_runs_per_worker:
+                self._replace_in_background(worker, graceful=True)
+            else:
+                self._idle.put(worker)
+            return ExecutionResult(ok=error is None, stdout=stdout, error=error,
+                                   files=self._collect_charts(workdir), elapsed_s=elapsed)
+        finally:
+            if workdir is not None:
+                shutil.rmtree(workdir, ignore_errors=True)
+
+
+_COLD_BOOTSTRAP = """
+import sys
+from ai_agent_experiments.code_executor import _warm_up
+warm = _warm_up(sys.argv[1] or None)
+exec(compile(sys.stdin.read(), "<execute_python>", "exec"), {"__name__": "__main__", **warm})
+"""
+
+
+def run_cold(code: str, csv_path: str | None = None, limits: ExecutionLimits | None = None) -> ExecutionResult:
+    """Run a snippet in a fresh interpreter, the way it would be executed without the pool."""
+    limits = limits or ExecutionLimits()
+    if "<execute_python>" in code:
+        code = extract_execute_python_code(code)
+    workdir = tempfile.mkdtemp(prefix="execute_python_")
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.getcwd(), os.getenv("PYTHONPATH")])))
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run([sys.executable, "-c", _COLD_BOOTSTRAP, os.path.abspath(csv_path) if csv_path else ""],
+                              input=code, capture_output=True, text=True, cwd=workdir, env=env,
+                              timeout=limits.wall_seconds)
+        return ExecutionResult(ok=proc.returncode == 0, stdout=proc.stdout,
+                               error=proc.stderr if proc.returncode else None,
+                               elapsed_s=time.perf_counter() - start)
+    except subprocess.TimeoutExpired:
+        return ExecutionResult(ok=False, stdout="", error=f"Timed out after {limits.wall_seconds}s",
+                               elapsed_s=time.perf_counter() - start)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    # Compare per-snippet latency of the warm pool against a cold subprocess.
+    # Usage: poetry run python -m ai_agent_experiments.code_executor resources/1.csv
+    data_path = sys.argv[1] if len(sys.argv) > 1 else None
+    snippets = [
+        "print(df.shape)",
+        "print(df.describe())",
+        "<execute_python>\nfig, ax = plt.subplots()\nax.plot(range(10))\nfig.savefig('bench.png', dpi=100)\n"
+        "plt.close(fig)\n</execute_python>",
+    ]
+    with PythonExecutionPool(csv_path=data_path, size=2, output_dir="bench_charts") as pool:
+        print(f"{'snippet':<12}{'warm (s)':>10}{'cold (s)':>10}")
+        for i, snippet in enumerate(snippets):
+            warm_result = pool.run(snippet)
+            cold_result = run_cold(snippet, data_path)
+            if not warm_result.ok:
+                print(warm_result.error)
+            print(f"{i:<12}{warm_result.elapsed_s:>10.3f}{cold_result.elapsed_s:>10.3f}")
@@ -1,6 +1,7 @@
 import json
 import os
 from dataclasses import dataclass, field
+from functools import lru_cache
 from typing import Optional, Union
 
 from dotenv import load_dotenv
@@ -81,14 +82,27 @@ class Configuration:
         }
         self.faiss_server_config = {
             "path": str.strip(str(os.getenv("FAISS_EMBEDDINGS_SAVE_PATH", ""))),
-            "dimension": os.getenv("FAISS_EMBEDDINGS_DIMENSION", 1536),
-            "chunk_size": os.getenv("FAISS_CHUNK_SIZE", 1000),
-            "chunk_overlap": os.getenv("FAISS_CHUNK_OVERLAP", 100),
+            "dimension": int(os.getenv("FAISS_EMBEDDINGS_DIMENSION", 1536)),
+            "chunk_size": int(os.getenv("FAISS_CHUNK_SIZE", 1000)),
+            "chunk_overlap": int(os.getenv("FAISS_CHUNK_OVERLAP", 100)),
             "embedding_metric": os.getenv("FAISS_EMBEDDING_METRIC", "cosine"),
+            "embedding_model": str.strip(str(os.getenv("FAISS_EMBEDDING_MODEL", "text-embedding-ada-002"))),
+        }
+        self.tool_router_config = {
+            # Tools attached per turn once more than this many are registered; 0 always sends every tool
+            "top_k": int(os.getenv("TOOL_ROUTER_TOP_K") or 0),
+            "pinned": [name.strip() for name in os.getenv("TOOL_ROUTER_PINNED", "").split(",") if name.strip()],
         }
         self.anthropic_config = {
             "api_key": str.strip(str(os.getenv("ANTHROPIC_API_KEY", ""))),
         }
+        self.image_config = {
+            # `or`: a blank value in .env (KEY=) means unset, not ""
+            # Longest edge (px) images are downscaled to before upload; 0 sends files unchanged
+            "max_edge": int(os.getenv("IMAGE_MAX_EDGE") or 1024),
+            "format": str.strip(str(os.getenv("IMAGE_FORMAT") or "WEBP")).upper(),
+            "quality": int(os.getenv("IMAGE_QUALITY") or 85),
+        }
 
 
 
@@ -96,5 +110,20 @@ class Configuration:
         return self._mcp_config[server_name]
 
 
+@lru_cache(maxsize=None)
+def _cached_configuration(abs_path: str) -> Configuration:
+    return Configuration(abs_path)
+
+
+def get_configuration(path: str = "../config.json") -> Configuration:
+    """
+    Return the process-wide Configuration for `path`.
+
+    The first call reads `.env` and the MCP config file; later calls for the same
+    file return the same instance instead of re-running `load_dotenv`.
+    """
+    return _cached_configuration(os.path.abspath(path))
+
+
 if __name__ == "__main__":
-    config = Configuration("../config.json")
+    config = get_configuration("../config.json")
@@ -0,0 +1,95 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable, List
+
+import numpy as np
+
+from ai_agent_experiments.faiss_store import PersistentFaissStore
+
+
+def estimate_tokens(text: str) -> int:
+    # Roughly four characters per token for English text
+    return max(1, len(text) // 4)
+
+
+@dataclass
+class PackedContext:
+    text: str
+    chunks: List[dict] = field(default_factory=list)
+    tokens: int = 0
+    candidates: int = 0
+    duplicates: int = 0
+
+
+def mmr_order(query_vector: np.ndarray, vectors: np.ndarray, lambda_mult: float = 0.7,
+              duplicate_threshold: float = 0.95) -> tuple[list[int], int]:
+    """
+    Maximal marginal relevance ordering of `vectors` (normalized rows) for `query_vector`.
+
+    Each pick maximizes `lambda_mult * relevance - (1 - lambda_mult) * similarity to the closest pick
+    so far`. Candidates at least `duplicate_threshold` similar to a pick are dropped as near-duplicates.
+    All similarities come from one matrix product; each pick then costs one vector update.
+    Returns (candidate order, number of duplicates dropped).
+    """
+    count = len(vectors)
+    relevance = vectors @ query_vector
+    similarity = vectors @ vectors.T
+    closest = np.full(count, -np.inf, dtype="float32")
+    available = np.ones(count, dtype=bool)
+    order = []
+    duplicates = 0
+    while available.any():
+        redundancy = np.where(np.isfinite(closest), closest, 0.0)
+        scores = np.where(available, lambda_mult * relevance - (1 - lambda_mult) * redundancy, -np.inf)
+        pick = int(np.argmax(scores))
+        order.append(pick)
+        available[pick] = False
+        closest = np.maximum(closest, similarity[pick])
+        near_duplicates = available & (closest >= duplicate_threshold)
+        duplicates += int(near_duplicates.sum())
+        available &= ~near_duplicates
+    return order, duplicates
+
+
+def pack_context(store: PersistentFaissStore, query_embedding: Any, token_budget: int = 1000,
+                 fetch_k: int = 20, lambda_mult: float = 0.7, duplicate_threshold: float = 0.95,
+                 count_tokens: Callable[[str], int] = estimate_tokens, separator: str = "\n\n") -> PackedContext:
+    """
+    Retrieve context for a query that fits in `token_budget` tokens.
+
+    Over-fetches `fetch_k` chunks, orders them by MMR over their stored vectors (dropping
+    near-duplicates), and adds chunks in that order while they fit the budget.
+    """
+    results, vectors = store.search_with_vectors(query_embedding, top_k=fetch_k)
+    if not results:
+        return PackedContext(text="")
+    query_vector = np.array(getattr(query_embedding, "embedding", query_embedding), dtype="float32")
+    query_vector /= np.linalg.norm(query_vector) or 1.0
+    order, duplicates = mmr_order(query_vector, vectors, lambda_mult, duplicate_threshold)
+
+    chosen, tokens = [], 0
+    separator_tokens = count_tokens(separator)
+    for i in order:
+        chunk_tokens = count_tokens(results[i]["chunk"]) + (separator_tokens if chosen else 0)
+        if tokens + chunk_tokens <= token_budget:
+            chosen.append(results[i])
+            tokens += chunk_tokens
+    return PackedContext(text=separator.join(result["chunk"] for result in chosen), chunks=chosen,
+                         tokens=tokens, candidates=len(results), duplicates=duplicates)
+
+
+def rag_messages(history: List[dict], question: str, context: str) -> List[dict]:
+    """Request messages for one RAG turn: the conversation so far plus the question with its context."""
+    return [*history, {"role": "user", "content": f"Context:\n{context}\n\nQuestion: {question}"}]
+
+
+def answer_with_context(client, model: str, history: List[dict], question: str, context: str) -> str:
+    """
+    Answer `question` from `context` and record the exchange in `history`.
+
+    Only the bare question and the answer are kept, so later turns do not re-send earlier contexts.
+    """
+    response = client.chat.completions.create(model=model, messages=rag_messages(history, question, context))
+    answer = response.choices[0].message.content
+    history.append({"role": "user", "content": question})
+    history.append({"role": "assistant", "content": answer})
+    return answer
@@ -40,7 +40,10 @@ class PersistentFaissStore:
             print("Saved embeddings to disk.")
 
     def add_embeddings(self, embeddings, chunks, metadata=None):
-        embedding_vector = np.array([item.embedding for item in embeddings.data]).astype("float32")
+        self.add_embedding_vectors([item.embedding for item in embeddings.data], chunks, metadata)
+
+    def add_embedding_vectors(self, vectors, chunks, metadata=None):
+        embedding_vector = np.array(vectors).astype("float32")
         faiss.normalize_L2(embedding_vector)
         self.index.add(embedding_vector)
         self.chunks.extend(chunks)
@@ -70,3 +73,34 @@ class PersistentFaissStore:
                 }
             )
         return results
+
+    def search_many(self, query_vectors, top_k=3) -> List[List[Any]]:
+        """
+        Search for several queries with one `index.search` call. `query_vectors` holds one embedding
+        per row; returns one result list per query, in the same form as `search`.
+        """
+        if len(self.chunks) == 0:
+            return [[] for _ in query_vectors]
+
+        query_matrix = np.array(query_vectors, dtype="float32").reshape(-1, self.embedding_dim)
+        faiss.normalize_L2(query_matrix)
+        similarities, indices = self.index.search(query_matrix, min(top_k, self.index.ntotal))
+        return [[{"index": i, "score": score, "chunk": self.chunks[i], "metadata": self.metadata[i]}
+                 for i, score in zip(row_ids, row_scores) if i >= 0]
+                for row_ids, row_scores in zip(indices, similarities)]
+
+    def search_with_vectors(self, query_embeddings, top_k=20) -> tuple[List[Any], np.ndarray]:
+        """
+        Like `search`, but also returns the stored (normalized) vectors of the results, one row per
+        result, so callers can compare results with each other without embedding them again.
+        """
+        if len(self.chunks) == 0:
+            return [], np.empty((0, self.embedding_dim), dtype="float32")
+
+        query_embedding_vector = np.array([getattr(query_embeddings, "embedding", query_embeddings)]).astype("float32")
+        faiss.normalize_L2(query_embedding_vector)
+        similarities, indices = self.index.search(query_embedding_vector, min(top_k, self.index.ntotal))
+        ids = indices[0][indices[0] >= 0]
+        results = [{"index": i, "score": score, "chunk": self.chunks[i], "metadata": self.metadata[i]}
+                   for i, score in zip(ids, similarities[0])]
+        return results, self.index.reconstruct_batch(ids)
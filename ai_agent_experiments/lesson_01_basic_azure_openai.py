@@ -1,41 +1,115 @@
-import html
+import asyncio
+import os
+from collections import OrderedDict
 
+import httpx
 import requests
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, AzureOpenAI
 from openai.types.chat import ChatCompletionSystemMessageParam, ChatCompletionUserMessageParam
 
-from ai_agent_experiments.config import Configuration
+from ai_agent_experiments.config import Configuration, get_configuration
+
+# Point DUCKDUCKGO_API_URL at a local stand-in to run without network access
+SEARCH_URL = os.getenv("DUCKDUCKGO_API_URL", "https://api.duckduckgo.com/")
+MAX_RELATED_TOPICS = 5
+# Search results kept per ResearchAgent, least recently used dropped first
+SEARCH_CACHE_SIZE = 256
+
+# One session for all searches so connections to the search API are reused
+_session = requests.Session()
+
+
+def trim_search_result(data: dict) -> dict:
+    """Keep only the fields of a DuckDuckGo Instant Answer response that are useful in a prompt."""
+    trimmed = {key: data[key] for key in ("Heading", "AbstractText", "AbstractURL", "Answer", "Definition")
+               if data.get(key)}
+    related = []
+    for topic in data.get("RelatedTopics", []):
+        # Grouped topics nest their entries under "Topics"
+        for item in topic.get("Topics", [topic]):
+            if item.get("Text"):
+                related.append({"Text": item["Text"], "FirstURL": item.get("FirstURL", "")})
+    if related:
+        trimmed["RelatedTopics"] = related[:MAX_RELATED_TOPICS]
+    return trimmed
 
 
 def search(user_query: str) -> dict[str, str]:
     # TODO: Add input validation and more comprehensive error handling
     try:
-        safe_input = html.escape(user_query.strip())
-        response = requests.get(f"https://api.duckduckgo.com/?q={safe_input}&format=json")
-        data = response.json()
-        print(data)
-        return data
+        response = _session.get(SEARCH_URL, params={"q": user_query.strip(), "format": "json"})
+        return trim_search_result(response.json())
     except requests.exceptions.JSONDecodeError:
         return {"error": "Invalid JSON response"}
 
 
+async def asearch(http: httpx.AsyncClient, user_query: str) -> dict[str, str]:
+    # Failures come back as an "error" result, so one failed search does not abort a whole run_many
+    try:
+        response = await http.get(SEARCH_URL, params={"q": user_query.strip(), "format": "json"})
+        response.raise_for_status()
+        return trim_search_result(response.json())
+    except httpx.HTTPError as e:
+        # First line only: status errors go on to a documentation link that would only cost prompt tokens
+        return {"error": f"Search failed: {str(e).splitlines()[0] if str(e) else type(e).__name__}"}
+    except ValueError:
+        return {"error": "Invalid JSON response"}
+
+
 class ResearchAgent:
-    def __init__(self, config:Configuration):
+    def __init__(self, config: Configuration, async_client: AsyncAzureOpenAI | None = None):
         self.client = AzureOpenAI(api_key=config.azure_open_ai_config["api_key"],
                                   azure_endpoint=config.azure_open_ai_config["azure_endpoint"],
                                   api_version=config.azure_open_ai_config["api_version"])
         self.model = config.azure_open_ai_config["model"]
+        self._config = config
+        self._async_client = async_client
+        # Search results by normalized query, shared by run and run_many
+        self._search_cache: OrderedDict[str, dict] = OrderedDict()
+
+    @property
+    def async_client(self) -> AsyncAzureOpenAI:
+        if self._async_client is None:
+            self._async_client = AsyncAzureOpenAI(api_key=self._config.azure_open_ai_config["api_key"],
+                                                  azure_endpoint=self._config.azure_open_ai_config["azure_endpoint"],
+                                                  api_version=self._config.azure_open_ai_config["api_version"])
+        return self._async_client
+
+    def _cached_result(self, key: str) -> dict | None:
+        result = self._search_cache.get(key)
+        if result is not None:
+            self._search_cache.move_to_end(key)
+        return result
+
+    def _cache_result(self, key: str, result: dict) -> dict:
+        # Failed searches are not cached, so the query is tried again next time
+        if "error" not in result:
+            self._search_cache[key] = result
+            if len(self._search_cache) > SEARCH_CACHE_SIZE:
+                self._search_cache.popitem(last=False)
+        return result
+
+    def _messages(self, search_result, original_query) -> list:
+        return [
+            ChatCompletionSystemMessageParam(
+                content="You are a research assistant that analyzes and summarizes information.", role="system"),
+            ChatCompletionUserMessageParam(
+                content=f"Analyze the following search result: {search_result} and relate it to the original query: {original_query}.  Synthesize the findings into a comprehensive answer",
+                role="user")
+        ]
 
     def analyze(self, search_result, original_query) -> str:
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=[
-                ChatCompletionSystemMessageParam(
-                    content="You are a research assistant that analyzes and summarizes information.", role="system"),
-                ChatCompletionUserMessageParam(
-                    content=f"Analyze the following search result: {search_result} and relate it to the original query: {original_query}.  Synthesize the findings into a comprehensive answer",
-                    role="user")
-            ],
+            messages=self._messages(search_result, original_query),
+            max_tokens=200
+        )
+        return response.choices[0].message.content
+
+    async def aanalyze(self, search_result, original_query) -> str:
+        response = await self.async_client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(search_result, original_query),
             max_tokens=200
         )
         return response.choices[0].message.content
@@ -43,16 +117,49 @@ class ResearchAgent:
     def run(self, query) -> str:
         # Step 1: Agent decides it needs external data
         print(f"Agent: I need to research '{query}'")
-        search_results = search(query)
+        key = query.strip().lower()
+        search_results = self._cached_result(key)
+        if search_results is None:
+            search_results = self._cache_result(key, search(query))
         # Step 2: Agent reasons about the external data
         print("Agent: Now I'll analyze what I found...")
         analysis = self.analyze(search_results, query)
         # Step 3: Return the final answer
         return analysis
 
+    async def _cached_asearch(self, http: httpx.AsyncClient, query: str) -> dict:
+        key = query.strip().lower()
+        search_results = self._cached_result(key)
+        if search_results is None:
+            search_results = self._cache_result(key, await asearch(http, query))
+        return search_results
+
+    async def arun(self, query: str, http: httpx.AsyncClient) -> str:
+        """Research one query asynchronously, searching over the caller's pooled HTTP client."""
+        return await self.aanalyze(await self._cached_asearch(http, query), query)
+
+    async def run_many(self, queries: list[str]) -> list[str]:
+        """
+        Research several queries over one pooled HTTP session. The search for the next query runs
+        while the current one is being analyzed. Answers are returned in query order.
+        """
+        answers = []
+        async with httpx.AsyncClient(timeout=30.0) as http:
+            next_search = asyncio.create_task(self._cached_asearch(http, queries[0])) if queries else None
+            try:
+                for i, query in enumerate(queries):
+                    search_results = await next_search
+                    if i + 1 < len(queries):
+                        next_search = asyncio.create_task(self._cached_asearch(http, queries[i + 1]))
+                    answers.append(await self.aanalyze(search_results, query))
+            finally:
+                if next_search is not None and not next_search.done():
+                    next_search.cancel()
+        return answers
+
 
 if __name__ == "__main__":
-    configuration = Configuration("../config.json")
+    configuration = get_configuration("../config.json")
     agent = ResearchAgent(configuration)
     user_input = "What are the latest trends in AI research?"
     result = agent.run(user_input)
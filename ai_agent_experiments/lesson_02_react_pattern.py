@@ -1,8 +1,15 @@
+import functools
 import re
+import time
 
 from openai import AzureOpenAI
 
-from ai_agent_experiments.config import Configuration
+from ai_agent_experiments.config import Configuration, get_configuration
+from ai_agent_experiments.safe_eval import evaluate
+
+# The model stops at PAUSE (an action was requested) and must never write its own Observation
+STOP_SEQUENCES = ["PAUSE", "Observation:"]
+ACTION_RE = re.compile(r'Action: (\w+): (.*)$')  # python regular expression to selection action
 
 
 class ReaActAgent:
@@ -22,7 +29,8 @@ Your available actions are:
 
 calculate:
 e.g. calculate: 4 * 7 / 3
-Runs a calculation and returns the number - uses Python so be sure to use floating point syntax if necessary
+Runs a calculation and returns the number - supports + - * / // % **, functions such as sqrt, round, sum, mean, min and max,
+and lists of values, e.g. calculate: mean([37, 20, 7]) or calculate: [37, 20] * 2.2
 
 average_dog_weight:
 e.g. average_dog_weight: Collie
@@ -43,12 +51,28 @@ You then output:
 
 Answer: A bulldog weights 51 lbs
 """.strip()
+        self.last_run_stats: dict = {}
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a new conversation (keeping the client and its HTTP connections) and clear usage stats."""
         self.messages = [
             {
                 "role": "system",
                 "content": self.system_message
             }
         ]
+        # cached_tokens: prompt tokens served from the provider's prompt cache (the system prompt and the
+        # conversation so far are sent unchanged every turn, so they form a stable prefix)
+        self.usage = {"prompt_tokens": 0, "completion_tokens": 0, "cached_tokens": 0, "llm_calls": 0}
+
+    def _add_usage(self, usage) -> None:
+        self.usage["llm_calls"] += 1
+        if usage is not None:
+            self.usage["prompt_tokens"] += usage.prompt_tokens
+            self.usage["completion_tokens"] += usage.completion_tokens
+            details = usage.prompt_tokens_details
+            self.usage["cached_tokens"] += (details.cached_tokens or 0) if details is not None else 0
 
     def __call__(self, query) -> str:
         self.messages.append(
@@ -61,26 +85,86 @@ Answer: A bulldog weights 51 lbs
             model=self.model,
             messages=self.messages
         )
+        self._add_usage(response.usage)
         self.messages.append({
             "role": "assistant",
             "content": response.choices[0].message.content
         })
         return response.choices[0].message.content
 
+    def stream_step(self, query) -> tuple[str, re.Match | None]:
+        """
+        Stream one completion and return (text, action match). Generation stops at the stop sequences,
+        and the stream is closed as soon as a complete `Action:` line has arrived so the action can be
+        dispatched without waiting for (or paying for) the rest of the completion.
+        """
+        self.messages.append({"role": "user", "content": query})
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=self.messages,
+            stop=STOP_SEQUENCES,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        text = ""
+        scanned = 0  # text before this offset holds only complete lines without an action
+        action_match: re.Match | None = None
+        streamed_chunks = 0
+        usage = None
+        try:
+            for chunk in stream:
+                if chunk.usage is not None:
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                streamed_chunks += 1
+                text += chunk.choices[0].delta.content or ""
+                while action_match is None and "\n" in text[scanned:]:
+                    end = text.index("\n", scanned)
+                    action_match = ACTION_RE.match(text[scanned:end])
+                    scanned = end + 1
+                if action_match:
+                    break
+        finally:
+            stream.close()
+        if action_match:
+            # Drop anything streamed after the action line
+            text = text[:scanned]
+        else:
+            # The stop sequence can end the stream right after the action line, before its newline
+            action_match = ACTION_RE.match(text[scanned:].strip())
+        text = text.rstrip()
 
-def run_interactive_agent(query, max_turns=5) -> str:
-    i = 0
+        self._add_usage(usage)
+        if usage is None:
+            # Closed before the final usage chunk; each content chunk is roughly one token
+            self.usage["completion_tokens"] += streamed_chunks
+        self.messages.append({"role": "assistant", "content": text})
+        return text, action_match
+
+
+@functools.cache
+def _get_agent() -> ReaActAgent:
+    # One agent (and one HTTP connection pool) for all queries in this process
+    return ReaActAgent(get_configuration("../config.json"))
+
+
+def run_interactive_agent(query, max_turns=5, agent: ReaActAgent | None = None) -> str:
     max_turns = 1 if max_turns <= 1 else max_turns
-    agent = ReaActAgent(Configuration("../config.json"))
-    action_re = re.compile(r'Action: (\w+): (.*)$')  # python regular expression to selection action
+    agent = agent or _get_agent()
+    agent.reset()
+    start = time.perf_counter()
+    try:
+        return _run_turns(agent, query, max_turns)
+    finally:
+        agent.last_run_stats = dict(agent.usage, wall_time_s=time.perf_counter() - start)
+
+
+def _run_turns(agent: ReaActAgent, query, max_turns) -> str:
+    i = 0
     while i < max_turns:
         i += 1
-        llm_response = agent(query)
-        action_match: re.Match | None = None
-        for a in llm_response.split("\n"):
-            if action_re.match(a):
-                action_match = action_re.match(a)
-                break
+        llm_response, action_match = agent.stream_step(query)
         if action_match:
             action_name = action_match.group(1)
             action_args = action_match.group(2)
@@ -96,9 +180,11 @@ def run_interactive_agent(query, max_turns=5) -> str:
 
 
 def calculate(what):
-    # TODO: Replace eval() with safer parsing for production use
-    # This is a simple implementation for learning purposes
-    return eval(what)
+    # Only whitelisted arithmetic is allowed; the model sees errors as the observation
+    try:
+        return evaluate(what)
+    except (ValueError, ArithmeticError, TypeError) as e:
+        return f"Error: {e}"
 
 
 def average_dog_weight(name):
@@ -121,3 +207,4 @@ if __name__ == "__main__":
     res = run_interactive_agent("I have 2 dogs, a border collie and a scottish terrier. \
 What is their combined weight")
     print(res)
+    print(_get_agent().last_run_stats)
@@ -2,13 +2,13 @@ from langchain_azure_ai.chat_models import AzureAIChatCompletionsModel
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
 
-from ai_agent_experiments.config import Configuration
+from ai_agent_experiments.config import get_configuration
 
 # This is a simple example of using the AzureAIChatCompletionsModel from langchain-azure-ai
 # to generate a personality summary and fun facts based on provided information.
 
 if __name__ == "__main__":
-    config = Configuration("../config.json")
+    config = get_configuration("../config.json")
     model = AzureAIChatCompletionsModel(model=config.azure_open_ai_config["model"],
                                         credential=config.azure_open_ai_config["api_key"],
                                         endpoint=config.azure_open_ai_config["inference_endpoint"],
@@ -1,61 +1,166 @@
-import json
-from typing import List
+from __future__ import annotations
 
-from openai import AsyncAzureOpenAI
-from openai.types.chat import ChatCompletionSystemMessageParam, ChatCompletionAssistantMessageParam, \
-    ChatCompletionUserMessageParam, ChatCompletionMessageParam, ChatCompletionToolMessageParam
+import contextlib
+import json
+from typing import TYPE_CHECKING, AsyncIterator, Iterator, List
 
 from ai_agent_experiments.config import Configuration
 from ai_agent_experiments.mcp_stdio_client import McpStdioClient
+from ai_agent_experiments.prompt_cache import CacheUsage, stable_tools
 
+# The openai SDK takes about half a second to import; main.py imports this module, so it is only
+# imported once a client is created
+if TYPE_CHECKING:
+    from openai import AsyncAzureOpenAI
+    from openai.types.chat import ChatCompletionMessageParam
+
+    from ai_agent_experiments.tool_router import ToolRouter
 
-class ChatBot:
-    def __init__(self, config: Configuration):
 
-        self.client = AsyncAzureOpenAI(api_key=config.azure_open_ai_config["api_key"],
-                                       azure_endpoint=config.azure_open_ai_config["azure_endpoint"],
-                                       api_version=config.azure_open_ai_config["api_version"])
+class ChatBot:
+    def __init__(self, config: Configuration, client: AsyncAzureOpenAI | None = None,
+                 mcp_client: McpStdioClient | None = None, tool_router: "ToolRouter | None" = None):
+        # A server hosting many conversations passes in one shared client, MCP connection pool and router
+        self._config = config
+        self._client: AsyncAzureOpenAI | None = client
+        self._tool_router = tool_router
         self.model = config.azure_open_ai_config["model"]
         self.system_message = "You are a helpful assistant. Your name is Bot. Be Polite in your answers. The way to exit any conversation with you is to type `exit`."
         self.messages: List[ChatCompletionMessageParam] = [
-            ChatCompletionSystemMessageParam(content=self.system_message, role="system")]
+            {"role": "system", "content": self.system_message}]
+        self.usage = CacheUsage()
+
+        self.mcp_client = mcp_client or McpStdioClient("research-server", "poetry",
+                                                       ["run", "python", "-m", "tools.research_server"])
+
+    @property
+    def client(self) -> AsyncAzureOpenAI:
+        # Created on first use so that constructing the bot (and starting the CLI) stays cheap
+        if self._client is None:
+            from openai import AsyncAzureOpenAI
+
+            self._client = AsyncAzureOpenAI(api_key=self._config.azure_open_ai_config["api_key"],
+                                            azure_endpoint=self._config.azure_open_ai_config["azure_endpoint"],
+                                            api_version=self._config.azure_open_ai_config["api_version"])
+        return self._client
 
-        self.mcp_client = McpStdioClient("research-server", "poetry",
-                                         ["run", "python", "-m", "tools.research_server"])
+    @property
+    def tool_router(self) -> "ToolRouter | None":
+        # Only used when TOOL_ROUTER_TOP_K is set; otherwise every tool is sent with every request
+        if self._tool_router is None and self._config.tool_router_config["top_k"] > 0:
+            from ai_agent_experiments.tool_router import ToolRouter, azure_embedder
+
+            model = self._config.faiss_server_config["embedding_model"]
+            self._tool_router = ToolRouter(azure_embedder(self.client, model),
+                                           top_k=self._config.tool_router_config["top_k"],
+                                           pinned=self._config.tool_router_config["pinned"],
+                                           embedding_model=model)
+        return self._tool_router
+
+    async def _tools_for(self, query: str) -> List:
+        """
+        The tools to offer the model for this turn: all of them, or the router's pick for `query`.
+        They are sent in a stable order, so that with the system prompt they form a cacheable prefix.
+        """
+        tools = await self.mcp_client.get_available_tools()
+        router = self.tool_router
+        return stable_tools(tools if router is None else await router.select(query, tools))
+
+    @contextlib.contextmanager
+    def _rollback_on_error(self) -> Iterator[None]:
+        """
+        Undo a turn that does not complete (a failed model or tool call, or a cancelled stream), which
+        would otherwise leave its user message, or tool calls without results, in the history.
+        """
+        turn_start = len(self.messages)
+        try:
+            yield
+        except BaseException:
+            del self.messages[turn_start:]
+            raise
 
     async def run(self, query) -> str:
         # TODO: Add input validation and error handling for production use
-        self.messages.append(ChatCompletionUserMessageParam(content=query, role="user"))
-        response = await  self.client.chat.completions.create(
-            model=self.model,
-            messages=self.messages,
-            tools=await self.mcp_client.get_available_tools(),
-        )
-        continues = True
-        while continues:
-            message = response.choices[0].message
-            if message.tool_calls:
-                self.messages.append(ChatCompletionAssistantMessageParam(role="assistant", content=message.content,
-                                                                         tool_calls=message.tool_calls))
-
-                for tool_call in message.tool_calls:
-                    tool_name = tool_call.function.name
-                    tool_args = json.loads(tool_call.function.arguments)
-
-                    print(f"Calling tool {tool_name} with args {tool_args}")
-
-                    result = await self.mcp_client.use_tool(tool_name, tool_args)
-                    # McpStdioClient returns a normalized string; append directly as a tool message
-                    self.messages.append(
-                        ChatCompletionToolMessageParam(role="tool", content=result, tool_call_id=tool_call.id))
-
-                response = await self.client.chat.completions.create(
+        with self._rollback_on_error():
+            self.messages.append({"role": "user", "content": query})
+            tools = await self._tools_for(query)
+            response = await  self.client.chat.completions.create(
+                model=self.model,
+                messages=self.messages,
+                tools=tools,
+            )
+            self.usage.record(response.usage)
+            continues = True
+            while continues:
+                message = response.choices[0].message
+                if message.tool_calls:
+                    self.messages.append({"role": "assistant", "content": message.content,
+                                       "tool_calls": message.tool_calls})
+                    await self._call_tools([(tool_call.id, tool_call.function.name, tool_call.function.arguments)
+                                            for tool_call in message.tool_calls])
+
+                    response = await self.client.chat.completions.create(
+                        model=self.model,
+                        messages=self.messages,
+                        tools=tools
+                    )
+                    self.usage.record(response.usage)
+                else:
+                    continues = False
+            # Return the final assistant message content
+            final_message = response.choices[0].message
+            return final_message.content or ""
+
+    async def _call_tools(self, tool_calls: list[tuple[str, str, str]]) -> None:
+        """Run (id, name, JSON arguments) tool calls over MCP and append the results as tool messages."""
+        for tool_call_id, tool_name, arguments in tool_calls:
+            tool_args = json.loads(arguments)
+
+            print(f"Calling tool {tool_name} with args {tool_args}")
+
+            result = await self.mcp_client.use_tool(tool_name, tool_args)
+            # McpStdioClient returns a normalized string; append directly as a tool message
+            self.messages.append(
+                {"role": "tool", "content": result, "tool_call_id": tool_call_id})
+
+    async def run_stream(self, query) -> AsyncIterator[str]:
+        """Like `run`, but yields the answer as it is generated. Tool-call rounds are handled in between."""
+        with self._rollback_on_error():
+            self.messages.append({"role": "user", "content": query})
+            tools = await self._tools_for(query)
+            while True:
+                stream = await self.client.chat.completions.create(
                     model=self.model,
                     messages=self.messages,
-                    tools=await self.mcp_client.get_available_tools()
+                    tools=tools,
+                    stream=True,
+                    stream_options={"include_usage": True},
                 )
-            else:
-                continues = False
-        # Return the final assistant message content
-        final_message = response.choices[0].message
-        return final_message.content or ""
+                content: list[str] = []
+                # Tool calls arrive in fragments keyed by index: [id, name, arguments]
+                tool_calls: dict[int, list[str]] = {}
+                async for chunk in stream:
+                    self.usage.record(chunk.usage)
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if delta.content:
+                        content.append(delta.content)
+                        yield delta.content
+                    for fragment in delta.tool_calls or []:
+                        call = tool_calls.setdefault(fragment.index, ["", "", ""])
+                        if fragment.id:
+                            call[0] = fragment.id
+                        if fragment.function and fragment.function.name:
+                            call[1] += fragment.function.name
+                        if fragment.function and fragment.function.arguments:
+                            call[2] += fragment.function.arguments
+                if not tool_calls:
+                    self.messages.append({"role": "assistant", "content": "".join(content)})
+                    return
+                calls = [tuple(tool_calls[index]) for index in sorted(tool_calls)]
+                self.messages.append({
+                    "role": "assistant", "content": "".join(content) or None,
+                    "tool_calls": [{"id": call_id, "type": "function", "function": {"name": name, "arguments": arguments}}
+                                   for call_id, name, arguments in calls]})
+                await self._call_tools(calls)
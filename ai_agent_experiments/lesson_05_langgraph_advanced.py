@@ -1,8 +1,8 @@
+import asyncio
 import operator
 from typing import Annotated, Any, TypedDict, Type, Optional
 
-import wikipediaapi
-from langchain_core.messages import AnyMessage, SystemMessage, HumanMessage, ToolMessage
+from langchain_core.messages import AIMessage, AnyMessage, SystemMessage, HumanMessage, ToolMessage
 from langchain_core.tools import BaseTool
 from langchain_openai import AzureChatOpenAI
 from langchain_tavily import TavilySearch
@@ -10,7 +10,9 @@ from langgraph.constants import END
 from langgraph.graph import StateGraph
 from pydantic import BaseModel, Field
 
-from ai_agent_experiments.config import Configuration
+from ai_agent_experiments.checkpoint_store import MessageCheckpointStore
+from ai_agent_experiments.config import get_configuration
+from ai_agent_experiments.wiki_cache import WikiPageCache, get_default_wiki_cache
 
 
 class AgentState(TypedDict):
@@ -18,29 +20,86 @@ class AgentState(TypedDict):
 
 
 class LangGraphAgent:
-    def __init__(self, model: AzureChatOpenAI, user_tools: list[BaseTool], system_prompt: str = ""):
-        # Build the graph
-        graph = StateGraph(state_schema=AgentState)
-        graph.add_node("llm", self.call_llm)
-        graph.add_node("action", self.take_action)
-        graph.add_conditional_edges("llm", self.exists_action, {True: "action", False: END})
-        graph.add_edge("action", "llm")
-        graph.set_entry_point("llm")
-        self.graph = graph.compile()
+    def __init__(self, model: AzureChatOpenAI, user_tools: list[BaseTool], system_prompt: str = "",
+                 max_concurrency: int = 4, tool_timeout: float = 30.0):
+        # Build the graph: `graph` runs nodes synchronously, `async_graph` is meant for `ainvoke` and
+        # runs the tool calls of one turn concurrently
+        self.graph = self._build_graph(self.call_llm, self.take_action)
+        self.async_graph = self._build_graph(self.acall_llm, self.atake_action)
 
         self.sys_prompt = system_prompt
         self.tools = {t.name: t for t in user_tools}
         self.model = model.bind_tools(user_tools)
+        self.max_concurrency = max_concurrency
+        self.tool_timeout = tool_timeout
+
+    def _build_graph(self, llm_node, action_node):
+        graph = StateGraph(state_schema=AgentState)
+        graph.add_node("llm", llm_node)
+        graph.add_node("action", action_node)
+        graph.add_conditional_edges("llm", self.exists_action, {True: "action", False: END})
+        graph.add_edge("action", "llm")
+        # A thread resumed after a crash between the llm and action steps starts with the pending tool calls
+        graph.set_conditional_entry_point(self.entry_node, {"llm": "llm", "action": "action"})
+        return graph.compile()
+
+    def entry_node(self, state: AgentState):
+        last_message = state["messages"][-1]
+        return "action" if getattr(last_message, "tool_calls", None) else "llm"
+
+    def _needs_run(self, history: list[AnyMessage]) -> bool:
+        # Nothing to resume if the last step was an answer without tool calls
+        last_message = history[-1] if history else None
+        return not isinstance(last_message, AIMessage) or bool(last_message.tool_calls)
+
+    def run(self, store: MessageCheckpointStore, thread_id: str, messages: list[AnyMessage] | None = None):
+        """
+        Run a conversation thread, or resume it if `messages` is empty, checkpointing the messages each
+        node adds as soon as it finishes. To replay from an earlier step, run a fork of the thread:
+        `agent.run(store, store.fork(thread_id, step))`. Returns the full message history.
+        """
+        history = store.load_messages(thread_id)
+        if messages:
+            store.append_step(thread_id, "input", messages)
+            history = history + messages
+        if not self._needs_run(history):
+            return history
+        for update in self.graph.stream({"messages": history}, stream_mode="updates"):
+            for node, delta in update.items():
+                store.append_step(thread_id, node, delta["messages"])
+                history = history + delta["messages"]
+        return history
+
+    async def arun(self, store: MessageCheckpointStore, thread_id: str, messages: list[AnyMessage] | None = None):
+        """Async version of `run` using `async_graph`."""
+        history = store.load_messages(thread_id)
+        if messages:
+            store.append_step(thread_id, "input", messages)
+            history = history + messages
+        if not self._needs_run(history):
+            return history
+        async for update in self.async_graph.astream({"messages": history}, stream_mode="updates"):
+            for node, delta in update.items():
+                store.append_step(thread_id, node, delta["messages"])
+                history = history + delta["messages"]
+        return history
 
     def exists_action(self, state: AgentState):
         last_message = state["messages"][-1]
         return len(last_message.tool_calls) > 0
 
-    def call_llm(self, state: AgentState):
+    def _with_system_prompt(self, state: AgentState) -> list[AnyMessage]:
         msgs = state["messages"]
         if self.sys_prompt:
             msgs = [SystemMessage(content=self.sys_prompt)] + msgs
-        llm_result = self.model.invoke(msgs)
+        return msgs
+
+    def call_llm(self, state: AgentState):
+        llm_result = self.model.invoke(self._with_system_prompt(state))
+        return {"messages": [llm_result]}
+
+    async def acall_llm(self, state: AgentState):
+        llm_result = await self.model.ainvoke(self._with_system_prompt(state))
         return {"messages": [llm_result]}
 
     def take_action(self, state: AgentState):
@@ -53,6 +112,43 @@ class LangGraphAgent:
                                        content=self.tools[tool_name].invoke(tool_args)))
         return {"messages": results}
 
+    async def _arun_tool(self, tool_call, slots: asyncio.Semaphore) -> ToolMessage:
+        tool_name = tool_call["name"]
+        try:
+            if tool_name not in self.tools:
+                raise ValueError(f"Unknown tool '{tool_name}'")
+            async with slots:
+                content = await asyncio.wait_for(self.tools[tool_name].ainvoke(tool_call["args"]),
+                                                 timeout=self.tool_timeout)
+            return ToolMessage(tool_call_id=tool_call['id'], name=tool_name, content=content)
+        except asyncio.TimeoutError:
+            error = f"Tool '{tool_name}' timed out after {self.tool_timeout}s"
+        except Exception as e:
+            error = f"Tool '{tool_name}' failed: {e}"
+        # Report the failure to the model instead of aborting the graph
+        return ToolMessage(tool_call_id=tool_call['id'], name=tool_name, content=f"Error: {error}", status="error")
+
+    async def _prefetch(self, tool_calls) -> None:
+        # Tools that can batch lookups (e.g. several wiki pages in one turn) fetch them in one go first
+        calls_by_tool: dict[str, list[dict]] = {}
+        for tool_call in tool_calls:
+            calls_by_tool.setdefault(tool_call["name"], []).append(tool_call["args"])
+        for tool_name, args in calls_by_tool.items():
+            tool = self.tools.get(tool_name)
+            if len(args) > 1 and hasattr(tool, "aprefetch"):
+                try:
+                    await asyncio.wait_for(tool.aprefetch(args), timeout=self.tool_timeout)
+                except Exception:
+                    pass  # each call still runs (and reports its own error) below
+
+    async def atake_action(self, state: AgentState):
+        tool_calls = state["messages"][-1].tool_calls
+        await self._prefetch(tool_calls)
+        slots = asyncio.Semaphore(self.max_concurrency)
+        # gather keeps the results in the order the model made the calls
+        results = await asyncio.gather(*(self._arun_tool(tool_call, slots) for tool_call in tool_calls))
+        return {"messages": list(results)}
+
 
 class WikiToolInput(BaseModel):
     query: str
@@ -60,8 +156,8 @@ class WikiToolInput(BaseModel):
 
 class MyWikiTool(BaseTool):  # type: ignore[override]
     query: Optional[str] = Field(default="Pune", description="The thing that you want to look up")
-    wiki: Optional[wikipediaapi.Wikipedia] = Field(description="Wikipedia API",
-                                                   default=wikipediaapi.Wikipedia("test-agent", "en"))
+    cache: WikiPageCache = Field(description="Disk-backed cache of Wikipedia page summaries",
+                                 default_factory=get_default_wiki_cache)
     description: str = "Useful for when you need to answer questions about current events."
     args_schema: Type[BaseModel] = WikiToolInput
     name: str = "wiki"
@@ -70,15 +166,20 @@ class MyWikiTool(BaseTool):  # type: ignore[override]
         super().__init__(**kwargs)
 
     def _run(self, query: str) -> str:
-        page = self.wiki.page(query)
-        if page.exists():
-            return page.summary
-        else:
-            return "No page found"
+        summary = self.cache.get(query)
+        return summary if summary is not None else "No page found"
+
+    async def _arun(self, query: str) -> str:
+        summary = (await self.cache.aget_many([query]))[query.strip()]
+        return summary if summary is not None else "No page found"
+
+    async def aprefetch(self, args: list[dict]) -> None:
+        """Fetch all pages requested in one turn with batched requests, so each call is a cache hit."""
+        await self.cache.aget_many([a["query"] for a in args])
 
 
 if __name__ == "__main__":
-    config = Configuration("../config.json")
+    config = get_configuration("../config.json")
     prompt = """You are a smart research assistant. Use the search engine to look up information. \
     You are allowed to make multiple calls (either together or in sequence). \
     Only look up information when you are sure of what you want. \
@@ -95,5 +196,9 @@ if __name__ == "__main__":
     agent = LangGraphAgent(llm, tools, prompt)
     messages = [HumanMessage(
         content="Is there any wiki article about Cricket? If so, is it a good weather to play Cricket in Pune now?")]
-    result = agent.graph.invoke({"messages": messages})
-    print(result['messages'][-1].content)
+    # Both tools are requested in one turn, so the async graph runs them concurrently.
+    # Every step is checkpointed; running again with the same thread id and no messages resumes it.
+    checkpoints = MessageCheckpointStore("checkpoints/langgraph.db")
+    history = asyncio.run(agent.arun(checkpoints, "cricket-in-pune", messages))
+    print(history[-1].content)
+    print(f"Wikipedia cache: {wikitool.cache.stats()}")
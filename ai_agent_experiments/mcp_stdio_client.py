@@ -1,9 +1,51 @@
+from __future__ import annotations
+
+import json
 from contextlib import AsyncExitStack
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, List
+
+from mcp import ClientSession, StdioServerParameters, stdio_client, ListToolsResult, Tool
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionFunctionTool
+
+
+def to_openai_tool(tool: Tool) -> ChatCompletionFunctionTool:
+    """Convert an MCP tool definition to the OpenAI function tool format."""
+    from openai.types import FunctionDefinition
+    from openai.types.chat import ChatCompletionFunctionTool
 
-from mcp import ClientSession, StdioServerParameters, stdio_client, ListToolsResult
-from openai.types import FunctionDefinition
-from openai.types.chat import ChatCompletionFunctionTool
+    function = FunctionDefinition(name=tool.name, description=tool.description, parameters=tool.inputSchema)
+    return ChatCompletionFunctionTool(type="function", function=function)
+
+
+def normalize_tool_result(result: Any) -> str:
+    """
+    Normalize an MCP call_tool result to a plain string suitable for OpenAI tool messages.
+    Text and JSON content items are joined with newlines; anything else falls back to str().
+    """
+    try:
+        content_items = getattr(result, "content", None)
+        if isinstance(content_items, list) and content_items:
+            parts = []
+            for item in content_items:
+                if isinstance(item, dict):
+                    if item.get("type") == "text" and "text" in item:
+                        parts.append(item["text"])
+                    elif item.get("type") == "json" and "json" in item:
+                        parts.append(json.dumps(item["json"], indent=2))
+                else:
+                    t = getattr(item, "type", None)
+                    if t == "text" and hasattr(item, "text"):
+                        parts.append(item.text)
+                    elif t == "json" and hasattr(item, "json"):
+                        parts.append(json.dumps(item.json, indent=2))
+            if parts:
+                return "\n".join(parts)
+        tool_content = getattr(result, "result", None) or getattr(result, "output", None)
+        return tool_content if tool_content is not None else str(result)
+    except Exception:
+        return str(result)
 
 
 class McpStdioClient:
@@ -59,11 +101,8 @@ class McpStdioClient:
                 response:ListToolsResult = await self._session.list_tools()
                 tools = response.tools
                 print(f"Connected to server {self.name} with tools:", {t.name for t in tools})
-                for tool in tools:
-                    # Convert MCP tool to OpenAI tool format
-                    function= FunctionDefinition(name=tool.name, description=tool.description, parameters=tool.inputSchema)
-                    openai_tool = ChatCompletionFunctionTool(type="function", function=function)
-                    self._tools.append(openai_tool)
+                # Convert MCP tools to OpenAI tool format
+                self._tools.extend(to_openai_tool(tool) for tool in tools)
                 self._connected = True
             except Exception as e:
                 raise ConnectionError(f"Failed to connect to server: {str(e)}")
@@ -97,35 +136,7 @@ class McpStdioClient:
         # Call the MCP tool and normalize its result to a plain string
         result = await self._session.call_tool(name=tool_name, arguments=tool_args)
 
-        tool_content = None
-        try:
-            content_items = getattr(result, "content", None)
-            if isinstance(content_items, list) and content_items:
-                parts = []
-                for item in content_items:
-                    if isinstance(item, dict):
-                        if item.get("type") == "text" and "text" in item:
-                            parts.append(item["text"])
-                        elif item.get("type") == "json" and "json" in item:
-                            import json as _json
-                            parts.append(_json.dumps(item["json"], indent=2))
-                    else:
-                        t = getattr(item, "type", None)
-                        if t == "text" and hasattr(item, "text"):
-                            parts.append(item.text)
-                        elif t == "json" and hasattr(item, "json"):
-                            import json as _json
-                            parts.append(_json.dumps(item.json, indent=2))
-                if parts:
-                    tool_content = "\n".join(parts)
-            if tool_content is None:
-                tool_content = getattr(result, "result", None) or getattr(result, "output", None)
-            if tool_content is None:
-                tool_content = str(result)
-        except Exception:
-            tool_content = str(result)
-
-        return tool_content
+        return normalize_tool_result(result)
 
     async def disconnect(self) -> None:
         """
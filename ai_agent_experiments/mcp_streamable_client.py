@@ -1,9 +1,16 @@
+from __future__ import annotations
+
 from contextlib import AsyncExitStack
-from typing import Callable
+from typing import TYPE_CHECKING, Callable, List
 
 from mcp import ClientSession
 from mcp.client.streamable_http import streamablehttp_client
 
+from ai_agent_experiments.mcp_stdio_client import normalize_tool_result, to_openai_tool
+
+if TYPE_CHECKING:
+    from openai.types.chat import ChatCompletionFunctionTool
+
 
 class MCPStreamableClient:
     def __init__(self, name: str, server_url: str) -> None:
@@ -13,8 +20,9 @@ class MCPStreamableClient:
         self._connected: bool = False
         self._exit_stack = AsyncExitStack()
         self._get_session_id: Callable[[], str] = None
+        self._tools: List[ChatCompletionFunctionTool] | None = None
 
-    async def connect(self, headers: dict[str, str] | None) -> None:
+    async def connect(self, headers: dict[str, str] | None = None) -> None:
         if self._connected:
             raise RuntimeError("Already connected to the server.")
         else:
@@ -31,9 +39,20 @@ class MCPStreamableClient:
             await self._exit_stack.aclose()
             self._connected = False
             self._session = None
+            self._tools = None
 
-    async def use_tool(self, tool_name, tool_args):
-        pass
+    async def use_tool(self, tool_name: str, tool_args: dict) -> str:
+        """Call a tool on the server and return its result normalized to a string, as McpStdioClient does."""
+        if not self._connected or self._session is None:
+            raise ConnectionError("Not connected to the server. Call connect() before using tools.")
+        result = await self._session.call_tool(name=tool_name, arguments=tool_args)
+        return normalize_tool_result(result)
 
-    async def list_tools(self):
-        pass
+    async def list_tools(self) -> List[ChatCompletionFunctionTool]:
+        """The server's tools in OpenAI tool format; fetched once per connection."""
+        if not self._connected or self._session is None:
+            raise ConnectionError("Not connected to the server. Call connect() before listing tools.")
+        if self._tools is None:
+            response = await self._session.list_tools()
+            self._tools = [to_openai_tool(tool) for tool in response.tools]
+        return self._tools
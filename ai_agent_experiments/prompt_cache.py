@@ -0,0 +1,90 @@
+"""
+Request building for provider prompt caching.
+
+Providers reuse the work done for a request prefix they have seen recently:
+- OpenAI / Azure OpenAI cache automatically once a prefix reaches 1024 tokens, but only if it is
+  byte-identical. Tool schemas come first, then messages in order.
+- Anthropic caches up to the content blocks marked with `cache_control` (tools, then system, then
+  messages), and reports cache reads and writes separately.
+
+So static content (tool schemas, system prompts, an image re-sent across reflection rounds) goes
+first and is serialized the same way on every request, and per-request content goes last.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Iterable, List
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+
+def _tool_dict(tool: Any) -> dict:
+    if hasattr(tool, "model_dump"):
+        tool = tool.model_dump(exclude_none=True)
+    # Keys in sorted order at every level, so equal schemas serialize to equal bytes
+    return json.loads(json.dumps(tool, sort_keys=True))
+
+
+def stable_tools(tools: List[Any]) -> List[dict]:
+    """Tool schemas sorted by function name with keys in a fixed order, so the same set of tools is
+    sent as the same bytes whatever order the MCP servers or the tool router returned them in."""
+    # Not cached: MCP clients extend their tool list in place as servers connect, so the same list object
+    # can hold different tools, and converting 50 tools takes about a millisecond
+    return sorted((_tool_dict(tool) for tool in tools), key=lambda tool: tool.get("function", {}).get("name", ""))
+
+
+def cached_block(block: dict) -> dict:
+    """Mark an Anthropic content block as the end of a cacheable prefix."""
+    return dict(block, cache_control=CACHE_CONTROL)
+
+
+def anthropic_system(text: str) -> List[dict]:
+    """A system prompt as a cacheable Anthropic text block."""
+    return [cached_block({"type": "text", "text": text})]
+
+
+def anthropic_user_content(text: str, static_blocks: Iterable[dict] = ()) -> List[dict]:
+    """
+    User content with `static_blocks` (e.g. an image sent again on the next round) ahead of the
+    per-request `text`, with a cache breakpoint after the last static block.
+    """
+    blocks = list(static_blocks)
+    if blocks:
+        blocks[-1] = cached_block(blocks[-1])
+    return blocks + [{"type": "text", "text": text}]
+
+
+@dataclass
+class CacheUsage:
+    requests: int = 0
+    # All input tokens, including the ones read from or written to the cache
+    prompt_tokens: int = 0
+    cached_tokens: int = 0
+    # Anthropic only: tokens written to the cache, billed above the normal input price
+    cache_write_tokens: int = 0
+    completion_tokens: int = 0
+
+    def record(self, usage: Any) -> None:
+        """Add the usage of one OpenAI or Anthropic response (either SDK object, or None)."""
+        if usage is None:
+            return
+        self.requests += 1
+        if hasattr(usage, "input_tokens"):
+            read = usage.cache_read_input_tokens or 0
+            written = usage.cache_creation_input_tokens or 0
+            self.prompt_tokens += usage.input_tokens + read + written
+            self.cached_tokens += read
+            self.cache_write_tokens += written
+            self.completion_tokens += usage.output_tokens
+        else:
+            details = getattr(usage, "prompt_tokens_details", None)
+            self.prompt_tokens += usage.prompt_tokens
+            self.cached_tokens += (details.cached_tokens or 0) if details is not None else 0
+            self.completion_tokens += usage.completion_tokens
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cached_tokens / self.prompt_tokens if self.prompt_tokens else 0.0
+
+
+# Usage of the utils helpers (get_response, image_*_call), across calls
+cache_usage = CacheUsage()
@@ -0,0 +1,189 @@
+import ast
+import math
+import operator
+from functools import lru_cache
+from typing import Any, Callable
+
+import numpy as np
+
+MAX_EXPRESSION_LENGTH = 1000
+# Compiling and evaluating recurse once per level of nesting, e.g. per operator in "----1"
+MAX_EXPRESSION_DEPTH = 200
+# round() accepts ndigits in [-MAX_ROUND_DIGITS, MAX_ROUND_DIGITS]; a double has about 15 significant digits
+MAX_ROUND_DIGITS = 15
+# Python integers are exact and unbounded, so refuse results with more digits than this (4300 is
+# also the longest integer Python will convert to a string)
+MAX_RESULT_DIGITS = 4300
+_MAX_RESULT_BITS = int(MAX_RESULT_DIGITS * math.log2(10))
+
+
+class UnsafeExpressionError(ValueError):
+    """Raised when an expression uses syntax, names or functions outside the whitelist."""
+
+
+def _safe_pow(base, exponent):
+    if isinstance(base, int) and isinstance(exponent, int) and abs(base) > 1:
+        if exponent * math.log10(abs(base)) > MAX_RESULT_DIGITS:
+            raise UnsafeExpressionError("Result of ** is too large")
+    return operator.pow(base, exponent)
+
+
+def _checked(value):
+    """
+    NumPy scalars become Python numbers, so integer results cannot silently wrap around at 64 bits
+    (np.round(3) ** 100), and integers longer than MAX_RESULT_DIGITS are refused.
+    """
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, int) and value.bit_length() > _MAX_RESULT_BITS:
+        raise UnsafeExpressionError("Result is too large")
+    return value
+
+
+def _round(value, ndigits=None):
+    """Python's round (round(2.675, 2) == 2.67, round(2.6) == 3), element by element for arrays."""
+    if ndigits is not None:
+        ndigits = _checked(ndigits)
+        if not isinstance(ndigits, int) or isinstance(ndigits, bool) or abs(ndigits) > MAX_ROUND_DIGITS:
+            raise UnsafeExpressionError(f"round() needs an integer ndigits between -{MAX_ROUND_DIGITS} "
+                                        f"and {MAX_ROUND_DIGITS}")
+    if isinstance(value, np.ndarray):
+        return np.array([round(item, ndigits) for item in value.ravel().tolist()], dtype=float).reshape(value.shape)
+    return round(_checked(value), ndigits)
+
+
+def _reduce_or_elementwise(reduce: Callable, elementwise: Callable) -> Callable:
+    # min(3, 4) compares its arguments, min([3, 4]) reduces a list of values
+    def apply(*args):
+        if len(args) == 1:
+            return reduce(args[0])
+        return elementwise.reduce(np.broadcast_arrays(*args))
+    return apply
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: _safe_pow,
+}
+
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_FUNCTIONS = {
+    "abs": np.abs,
+    "round": _round,
+    "sqrt": np.sqrt,
+    "exp": np.exp,
+    "log": np.log,
+    "log10": np.log10,
+    "sin": np.sin,
+    "cos": np.cos,
+    "tan": np.tan,
+    "sum": np.sum,
+    "mean": np.mean,
+    "median": np.median,
+    "std": np.std,
+    "min": _reduce_or_elementwise(np.min, np.minimum),
+    "max": _reduce_or_elementwise(np.max, np.maximum),
+}
+
+_CONSTANTS = {"pi": math.pi, "e": math.e}
+
+Evaluator = Callable[[dict], Any]
+
+
+def _compile_node(node: ast.AST, names: set[str], depth: int = 0) -> Evaluator:
+    """Turn a whitelisted AST node into a closure; every other node type is rejected."""
+    if depth > MAX_EXPRESSION_DEPTH:
+        raise UnsafeExpressionError("Expression is nested too deeply")
+    depth += 1
+    if isinstance(node, ast.Expression):
+        return _compile_node(node.body, names, depth)
+    if isinstance(node, ast.Constant):
+        if type(node.value) not in (int, float):
+            raise UnsafeExpressionError(f"Unsupported constant {node.value!r}")
+        value = node.value
+        return lambda env: value
+    if isinstance(node, ast.Name):
+        name = node.id
+        if name in _CONSTANTS:
+            value = _CONSTANTS[name]
+            return lambda env: value
+        names.add(name)
+        return lambda env: env[name]
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        op = _BINARY_OPERATORS[type(node.op)]
+        left, right = _compile_node(node.left, names, depth), _compile_node(node.right, names, depth)
+        return lambda env: _checked(op(left(env), right(env)))
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        op = _UNARY_OPERATORS[type(node.op)]
+        operand = _compile_node(node.operand, names, depth)
+        return lambda env: _checked(op(operand(env)))
+    if isinstance(node, (ast.List, ast.Tuple)):
+        # Lists of values become arrays so arithmetic on them is vectorized
+        items = [_compile_node(item, names, depth) for item in node.elts]
+        return lambda env: np.array([item(env) for item in items], dtype=float)
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS:
+            raise UnsafeExpressionError(f"Unsupported function call: {ast.unparse(node.func)}")
+        if node.keywords:
+            raise UnsafeExpressionError("Keyword arguments are not supported")
+        function = _FUNCTIONS[node.func.id]
+        args = [_compile_node(arg, names, depth) for arg in node.args]
+        return lambda env: _checked(function(*(arg(env) for arg in args)))
+    raise UnsafeExpressionError(f"Unsupported syntax: {type(node).__name__}")
+
+
+class CompiledExpression:
+    """An arithmetic expression parsed and validated once; call it with values for its variables."""
+
+    def __init__(self, expression: str) -> None:
+        if len(expression) > MAX_EXPRESSION_LENGTH:
+            raise UnsafeExpressionError("Expression is too long")
+        try:
+            tree = ast.parse(expression.strip(), mode="eval")
+        except SyntaxError as e:
+            raise UnsafeExpressionError(f"Invalid expression: {e.msg}") from None
+        except (RecursionError, MemoryError):
+            raise UnsafeExpressionError("Expression is nested too deeply") from None
+        names: set[str] = set()
+        self.expression = expression
+        self._evaluate = _compile_node(tree, names)
+        self.variables = frozenset(names)
+
+    def __call__(self, **variables: Any) -> Any:
+        missing = self.variables - variables.keys()
+        if missing:
+            raise UnsafeExpressionError(f"Unknown names: {', '.join(sorted(missing))}")
+        env = {name: np.asarray(value, dtype=float) if isinstance(value, (list, tuple, np.ndarray)) else _checked(value)
+               for name, value in variables.items()}
+        with np.errstate(all="ignore"):
+            result = self._evaluate(env)
+        # Hand back plain Python numbers and lists rather than NumPy types
+        if isinstance(result, np.ndarray):
+            return result.tolist()
+        return _checked(result)
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(expression: str) -> CompiledExpression:
+    """Parse and validate an expression, reusing the compiled form for repeated strings."""
+    return CompiledExpression(expression)
+
+
+def evaluate(expression: str, **variables: Any) -> Any:
+    """
+    Safely evaluate an arithmetic expression such as `4 * 7 / 3` or `mean([3, 5, 8]) * 2`.
+
+    Only numbers, + - * / // % **, the functions in _FUNCTIONS, `pi`, `e` and the given variables
+    are allowed. Variables and list literals are NumPy float arrays, so operations on them are
+    vectorized. Integer results are exact Python integers of at most MAX_RESULT_DIGITS digits.
+    """
+    return compile_expression(expression)(**variables)
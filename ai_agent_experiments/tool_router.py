@@ -0,0 +1,135 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, List, Optional
+
+import faiss
+import numpy as np
+
+TOOL_EMBEDDING_CACHE_PATH = os.getenv("TOOL_ROUTER_CACHE_PATH", "cache/tool_embeddings.db")
+
+Embedder = Callable[[List[str]], Awaitable[List[List[float]]]]
+
+
+def _function(tool: Any) -> dict:
+    # Accept OpenAI tool objects (as returned by the MCP clients) as well as plain tool dicts
+    if hasattr(tool, "model_dump"):
+        tool = tool.model_dump(exclude_none=True)
+    return tool["function"]
+
+
+def tool_text(tool: Any) -> str:
+    """The text a tool is embedded from: its name, description and parameter schema."""
+    function = _function(tool)
+    return "\n".join([function["name"], function.get("description") or "",
+                      json.dumps(function.get("parameters") or {}, sort_keys=True)])
+
+
+class ToolRouter:
+    """
+    Picks the tools worth sending with a chat completion request.
+
+    Every tool's name, description and JSON schema is embedded once into a small FAISS inner-product
+    index. Each turn, only the `top_k` tools closest to the user's message are attached, plus any
+    `pinned` tools. With `top_k` or fewer tools registered, all of them are sent and nothing is embedded.
+
+    Tool embeddings are cached on disk keyed by a hash of the tool text and the embedding model, so
+    reconnecting to the same MCP servers (or restarting) does not embed them again.
+    """
+
+    def __init__(self, embed: Embedder, top_k: int = 5, pinned: Iterable[str] = (),
+                 embedding_model: str = "", cache_path: str = TOOL_EMBEDDING_CACHE_PATH,
+                 query_cache_size: int = 256) -> None:
+        self._embed = embed
+        self.top_k = top_k
+        self.pinned = set(pinned)
+        self.embedding_model = embedding_model
+        self.embedding_calls = 0
+        self._tools: Optional[List[Any]] = None
+        self._tool_keys: tuple[str, ...] = ()
+        self._tool_names: list[str] = []
+        self._index: Optional[faiss.IndexFlatIP] = None
+        self._queries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._query_cache_size = query_cache_size
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(cache_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS tool_embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.embedding_model}\n{text}".encode("utf-8")).hexdigest()
+
+    async def _embed_normalized(self, texts: List[str]) -> np.ndarray:
+        self.embedding_calls += 1
+        vectors = np.array(await self._embed(texts), dtype="float32")
+        faiss.normalize_L2(vectors)
+        return vectors
+
+    async def set_tools(self, tools: List[Any]) -> None:
+        """(Re)build the index for `tools`; a no-op when the tools have not changed."""
+        # MCP clients hand out the same cached list every turn, so most turns stop here
+        if tools is self._tools and len(tools) == len(self._tool_keys):
+            return
+        texts = [tool_text(tool) for tool in tools]
+        keys = tuple(self._key(text) for text in texts)
+        if keys == self._tool_keys:
+            self._tools = tools
+            return
+        with self._lock:
+            cached = {}
+            for key in set(keys):
+                row = self._conn.execute("SELECT vector FROM tool_embeddings WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    cached[key] = np.frombuffer(row[0], dtype="float32")
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        if missing:
+            vectors = await self._embed_normalized([texts[i] for i in missing])
+            with self._lock:
+                self._conn.executemany("INSERT OR REPLACE INTO tool_embeddings (key, vector) VALUES (?, ?)",
+                                       [(keys[i], vector.tobytes()) for i, vector in zip(missing, vectors)])
+            cached.update((keys[i], vector) for i, vector in zip(missing, vectors))
+
+        matrix = np.stack([cached[key] for key in keys])
+        index = faiss.IndexFlatIP(matrix.shape[1])
+        index.add(matrix)
+        self._index = index
+        self._tools = tools
+        self._tool_keys = keys
+        self._tool_names = [_function(tool)["name"] for tool in tools]
+
+    async def _query_vector(self, query: str) -> np.ndarray:
+        vector = self._queries.get(query)
+        if vector is None:
+            vector = await self._embed_normalized([query])
+            self._queries[query] = vector
+            if len(self._queries) > self._query_cache_size:
+                self._queries.popitem(last=False)
+        else:
+            self._queries.move_to_end(query)
+        return vector
+
+    async def select(self, query: str, tools: List[Any]) -> List[Any]:
+        """The `top_k` tools most relevant to `query` plus the pinned ones, in their original order."""
+        if len(tools) <= self.top_k:
+            return list(tools)
+        await self.set_tools(tools)
+        _, indices = self._index.search(await self._query_vector(query), self.top_k)
+        chosen = {int(i) for i in indices[0] if i >= 0}
+        return [tool for i, tool in enumerate(tools) if i in chosen or self._tool_names[i] in self.pinned]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def azure_embedder(client, model: str) -> Embedder:
+    """Embed texts with an (async) Azure OpenAI embeddings deployment."""
+
+    async def embed(texts: List[str]) -> List[List[float]]:
+        response = await client.embeddings.create(input=texts, model=model)
+        return [item.embedding for item in response.data]
+
+    return embed
@@ -1,50 +1,121 @@
 # === Standard Library ===
+from __future__ import annotations
+
+import base64
+import hashlib
+import io
 import mimetypes
+import os
 import re
+import time
+from collections import OrderedDict, deque
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
-# === Third-Party ===
-import pandas as pd
-from anthropic import Anthropic
-from openai import AzureOpenAI
+from ai_agent_experiments.config import Configuration, get_configuration
+from ai_agent_experiments.prompt_cache import anthropic_system, anthropic_user_content, cache_usage
+
+# === Third-Party (deferred) ===
+# pandas, IPython and the provider SDKs are imported inside the functions that need them
+# so that importing this module (e.g. from the CLI or an MCP server) stays cheap.
+if TYPE_CHECKING:
+    import pandas as pd
+    from anthropic import Anthropic
+    from openai import AzureOpenAI
 
-from ai_agent_experiments.config import Configuration
 
 # === Env & Clients ===
-config = Configuration("../config.json")
+def get_config() -> Configuration:
+    return get_configuration("../config.json")
+
+
+@cache
+def get_openai_client() -> AzureOpenAI:
+    """Create the shared Azure OpenAI client on first use."""
+    from openai import AzureOpenAI
+
+    config = get_config()
+    return AzureOpenAI(api_key=config.azure_open_ai_config["api_key"],
+                       azure_endpoint=config.azure_open_ai_config["azure_endpoint"],
+                       api_version=config.azure_open_ai_config["api_version"])
+
+
+@cache
+def get_anthropic_client() -> Anthropic:
+    """Create the shared Anthropic client on first use."""
+    from anthropic import Anthropic
 
-# Both clients read keys from env by default; explicit is also fine:
-openai_client = AzureOpenAI(api_key=config.azure_open_ai_config["api_key"],
-                            azure_endpoint=config.azure_open_ai_config["azure_endpoint"],
-                            api_version=config.azure_open_ai_config["api_version"])
-anthropic_client = Anthropic(api_key=config.anthropic_config["api_key"])
+    return Anthropic(api_key=get_config().anthropic_config["api_key"])
 
 
-def get_response(model: str, prompt: str) -> str:
+def __getattr__(name: str) -> Any:
+    # Keep `utils.config`, `utils.openai_client` and `utils.anthropic_client` working
+    # for notebooks without constructing anything at import time.
+    if name == "config":
+        return get_config()
+    if name == "openai_client":
+        return get_openai_client()
+    if name == "anthropic_client":
+        return get_anthropic_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def get_response(model: str, prompt: str, system: str | None = None) -> str:
+    """
+    Send `prompt` to `model`. Instructions that are the same on every call can go in `system`, which is
+    sent first so providers can serve it from their prompt cache.
+    """
     if "claude" in model.lower() or "anthropic" in model.lower():
         # Anthropic Claude format
-        message = anthropic_client.messages.create(
+        message = get_anthropic_client().messages.create(
             model=model,
             max_tokens=1000,
+            **({"system": anthropic_system(system)} if system else {}),
             messages=[{"role": "user", "content": [{"type": "text", "text": prompt}]}],
         )
+        cache_usage.record(message.usage)
         return message.content[0].text
 
     else:
         # Default to OpenAI format for all other models (gpt-4, o3-mini, o1, etc.)
         try:
-            response = openai_client.chat.completions.create(
-                model=config.azure_open_ai_config["model"],
-                messages=[{"role": "user", "content": prompt}],
+            response = get_openai_client().chat.completions.create(
+                model=get_config().azure_open_ai_config["model"],
+                messages=([{"role": "system", "content": system}] if system else [])
+                         + [{"role": "user", "content": prompt}],
             )
         except Exception as e:
             return f"Error: {e}"
+        cache_usage.record(response.usage)
         return response.choices[0].message.content
 
 
 # === Data Loading ===
-def load_and_prepare_data(csv_path: str) -> pd.DataFrame:
-    """Load CSV and derive date parts commonly used in charts."""
-    df = pd.read_csv(csv_path)
+# Prepared DataFrames are cached as uncompressed Arrow IPC (Feather v2) files so repeat loads can be
+# memory-mapped instead of re-parsing the CSV. Cache files live in `.data_cache/` next to the CSV
+# unless a cache_dir is given.
+DATA_CACHE_DIR = ".data_cache"
+
+
+def _data_cache_base(csv_path: str, cache_dir: str | None) -> tuple[str, str]:
+    """Return (prefix shared by all versions of this CSV, prefix for the current version)."""
+    abs_path = os.path.abspath(csv_path)
+    stat = os.stat(abs_path)
+    stem = os.path.splitext(os.path.basename(abs_path))[0]
+    path_key = hashlib.sha1(abs_path.encode("utf-8")).hexdigest()[:8]
+    version_key = hashlib.sha1(f"{stat.st_mtime_ns}:{stat.st_size}".encode("utf-8")).hexdigest()[:8]
+    directory = cache_dir or os.path.join(os.path.dirname(abs_path), DATA_CACHE_DIR)
+    shared = os.path.join(directory, f"{stem}-{path_key}")
+    return shared, f"{shared}-{version_key}"
+
+
+def _parse_csv(csv_path: str) -> pd.DataFrame:
+    import pandas as pd
+
+    try:
+        df = pd.read_csv(csv_path, engine="pyarrow")
+    except ImportError:
+        df = pd.read_csv(csv_path)
     # Be tolerant if 'date' exists
     if "date" in df.columns:
         df["date"] = pd.to_datetime(df["date"], errors="coerce")
@@ -54,6 +125,58 @@ def load_and_prepare_data(csv_path: str) -> pd.DataFrame:
     return df
 
 
+def _write_data_cache(df: pd.DataFrame, shared: str, versioned: str) -> None:
+    from pyarrow import feather
+
+    os.makedirs(os.path.dirname(versioned), exist_ok=True)
+    # Drop caches of older versions of the same CSV
+    directory, prefix = os.path.split(shared)
+    for name in os.listdir(directory):
+        if name.startswith(os.path.basename(prefix) + "-") and not name.startswith(os.path.basename(versioned)):
+            os.remove(os.path.join(directory, name))
+    # Write to temp files and rename so concurrent readers never see a partial cache
+    feather.write_feather(df, f"{versioned}.arrow.tmp", compression="uncompressed")
+    os.replace(f"{versioned}.arrow.tmp", f"{versioned}.arrow")
+    with open(f"{versioned}.schema.txt.tmp", "w") as f:
+        f.write(make_schema_text(df))
+    os.replace(f"{versioned}.schema.txt.tmp", f"{versioned}.schema.txt")
+
+
+def load_and_prepare_data(csv_path: str, cache_dir: str | None = None, use_cache: bool = True) -> pd.DataFrame:
+    """
+    Load CSV and derive date parts commonly used in charts.
+
+    The first load parses the CSV with the pyarrow engine and caches the typed result (derived columns
+    included) keyed by path and mtime; later loads read the memory-mapped Arrow file into a writable frame.
+    """
+    if not use_cache:
+        return _parse_csv(csv_path)
+    shared, versioned = _data_cache_base(csv_path, cache_dir)
+    if os.path.exists(f"{versioned}.arrow"):
+        from pyarrow import feather
+
+        table = feather.read_table(f"{versioned}.arrow", memory_map=True)
+        # Converted into pandas-owned blocks: a zero-copy frame over the mapped file would be read-only,
+        # unlike the frame returned by the first (uncached) load
+        return table.to_pandas()
+    df = _parse_csv(csv_path)
+    try:
+        _write_data_cache(df, shared, versioned)
+    except (ImportError, OSError) as e:
+        print(f"Could not cache {csv_path}: {e}")
+    return df
+
+
+def get_schema_text(csv_path: str, cache_dir: str | None = None) -> str:
+    """Return the schema text for a CSV, from the cache written by load_and_prepare_data when possible."""
+    _, versioned = _data_cache_base(csv_path, cache_dir)
+    schema_path = f"{versioned}.schema.txt"
+    if not os.path.exists(schema_path):
+        return make_schema_text(load_and_prepare_data(csv_path, cache_dir))
+    with open(schema_path, "r") as f:
+        return f.read()
+
+
 # === Helpers ===
 def make_schema_text(df: pd.DataFrame) -> str:
     """Return a human-readable schema from a DataFrame."""
@@ -70,19 +193,92 @@ def ensure_execute_python_tags(text: str) -> str:
     return text
 
 
-def encode_image_b64(path: str) -> tuple[str, str]:
-    """Return (media_type, base64_str) for an image file path."""
-    mime, _ = mimetypes.guess_type(path)
-    media_type = mime or "image/png"
+def extract_execute_python_code(text: str) -> str:
+    """Return the code inside the first <execute_python> block (normalizing the tags first)."""
+    match = re.search(r"<execute_python>([\s\S]*?)</execute_python>", ensure_execute_python_tags(text))
+    return match.group(1).strip() if match else ""
+
+
+# === Image Payloads ===
+# Multiple of 3 so each chunk base64-encodes without padding and the pieces can be joined
+_IMAGE_READ_CHUNK = 3 * 64 * 1024
+_IMAGE_CACHE_SIZE = 32
+_image_payload_cache: OrderedDict[tuple, tuple[str, str]] = OrderedDict()
+
+# One entry per recent image_*_call (provider, model, bytes_uploaded and latency_s); the oldest drop off
+_IMAGE_CALL_STATS_SIZE = 1000
+image_call_stats: deque[dict[str, Any]] = deque(maxlen=_IMAGE_CALL_STATS_SIZE)
+
+
+def _file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
     with open(path, "rb") as f:
-        b64 = base64.b64encode(f.read()).decode("utf-8")
-    return media_type, b64
+        for chunk in iter(lambda: f.read(_IMAGE_READ_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
-import base64
-from IPython.display import HTML, display
-import pandas as pd
-from typing import Any
+def _file_b64(path: str) -> str:
+    # Encode chunk by chunk so the raw file is never held in memory next to its base64 copy
+    with open(path, "rb") as f:
+        return "".join(base64.b64encode(chunk).decode("ascii") for chunk in iter(lambda: f.read(_IMAGE_READ_CHUNK), b""))
+
+
+def prepare_image(path: str, max_edge: int | None = None, image_format: str | None = None,
+                  quality: int | None = None) -> tuple[str, str]:
+    """
+    Return (media_type, base64_str) for an image, downscaled so its longest edge is at most `max_edge`
+    and re-encoded as `image_format`. Defaults come from Configuration.image_config.
+
+    Payloads are cached by file content hash, so re-sending the same chart across reflection
+    iterations does not re-encode it. The original file is sent unchanged when max_edge is 0 or
+    re-encoding would not make it smaller.
+    """
+    image_config = get_config().image_config
+    max_edge = image_config["max_edge"] if max_edge is None else max_edge
+    image_format = (image_format or image_config["format"]).upper()
+    quality = image_config["quality"] if quality is None else quality
+
+    key = (_file_sha256(path), max_edge, image_format, quality)
+    if key in _image_payload_cache:
+        _image_payload_cache.move_to_end(key)
+        return _image_payload_cache[key]
+
+    mime, _ = mimetypes.guess_type(path)
+    payload = (mime or "image/png", None)
+    if max_edge:
+        from PIL import Image
+
+        with Image.open(path) as img:
+            resized = max(img.size) > max_edge
+            img.thumbnail((max_edge, max_edge))
+            if image_format == "JPEG" and img.mode not in ("RGB", "L"):
+                img = img.convert("RGB")
+            buffer = io.BytesIO()
+            img.save(buffer, format=image_format, quality=quality)
+        if resized or buffer.tell() < os.path.getsize(path):
+            payload = (Image.MIME[image_format], base64.b64encode(buffer.getbuffer()).decode("ascii"))
+    if payload[1] is None:
+        payload = (payload[0], _file_b64(path))
+
+    _image_payload_cache[key] = payload
+    if len(_image_payload_cache) > _IMAGE_CACHE_SIZE:
+        _image_payload_cache.popitem(last=False)
+    return payload
+
+
+def encode_image_b64(path: str) -> tuple[str, str]:
+    """Return (media_type, base64_str) for an image file path, prepared for upload by prepare_image."""
+    return prepare_image(path)
+
+
+def _record_image_call(provider: str, model_name: str, prompt: str, b64: str, start: float) -> None:
+    image_call_stats.append({
+        "provider": provider,
+        "model": model_name,
+        "bytes_uploaded": len(prompt.encode("utf-8")) + len(b64),
+        "latency_s": time.perf_counter() - start,
+    })
 
 
 def print_html(content: Any, title: str | None = None, is_image: bool = False):
@@ -92,6 +288,9 @@ def print_html(content: Any, title: str | None = None, is_image: bool = False):
     - If content is a pandas DataFrame/Series: render as an HTML table.
     - Otherwise (strings/others): show as code/text in <pre><code>.
     """
+    import pandas as pd
+    from IPython.display import HTML, display
+
     try:
         from html import escape as _escape
     except ImportError:
@@ -167,54 +366,60 @@ def print_html(content: Any, title: str | None = None, is_image: bool = False):
     display(HTML(css + card))
 
 
+JSON_ONLY_SYSTEM_PROMPT = ("You are a careful assistant. Respond with a single valid JSON object only. "
+                           "Do not include markdown, code fences, or commentary outside JSON.")
+
+
 def image_anthropic_call(model_name: str, prompt: str, media_type: str, b64: str) -> str:
     """
     Call Anthropic Claude (messages.create) with text+image and return *all* text blocks concatenated.
     Adds a system message to enforce strict JSON output.
+
+    The image goes before the prompt and is marked cacheable, so sending the same chart again with a
+    different prompt reads the system prompt and image from Anthropic's prompt cache.
     """
-    msg = anthropic_client.messages.create(
+    start = time.perf_counter()
+    msg = get_anthropic_client().messages.create(
         model=model_name,
         max_tokens=2000,
         temperature=0,
-        system=(
-            "You are a careful assistant. Respond with a single valid JSON object only. "
-            "Do not include markdown, code fences, or commentary outside JSON."
-        ),
+        system=anthropic_system(JSON_ONLY_SYSTEM_PROMPT),
         messages=[{
             "role": "user",
-            "content": [
-                {"type": "text", "text": prompt},
+            "content": anthropic_user_content(prompt, [
                 {"type": "image", "source": {"type": "base64", "media_type": media_type, "data": b64}},
-            ],
+            ]),
         }],
     )
+    cache_usage.record(msg.usage)
 
     # Anthropic returns a list of content blocks; collect all text
     parts = []
     for block in (msg.content or []):
         if getattr(block, "type", None) == "text":
             parts.append(block.text)
+    _record_image_call("anthropic", model_name, prompt, b64, start)
     return "".join(parts).strip()
 
 
 def image_openai_call(model_name: str, prompt: str, media_type: str, b64: str) -> str:
     data_url = f"data:{media_type};base64,{b64}"
-    resp = openai_client.chat.completions.create(
-        model=config.azure_open_ai_config["model"],
+    start = time.perf_counter()
+    resp = get_openai_client().chat.completions.create(
+        model=get_config().azure_open_ai_config["model"],
         messages=[
-            {
-                "role": "system",
-                "content":"You are a careful assistant. Respond with a single valid JSON object only. "
-            "Do not include markdown, code fences, or commentary outside JSON."
-            },
+            {"role": "system", "content": JSON_ONLY_SYSTEM_PROMPT},
             {
                 "role": "user",
+                # Image first: it stays the same across reflection rounds, the prompt does not
                 "content": [
+                    {"type": "image_url", "image_url": {"url": data_url}},
                     {"type": "text", "text": prompt},
-                    {"type": "image_url", "image_url": {"url": data_url}}
                 ]
             }
         ],
     )
+    cache_usage.record(resp.usage)
     content = (resp.choices[0].message.content or "").strip()
+    _record_image_call("openai", model_name, prompt, b64, start)
     return content
@@ -0,0 +1,143 @@
+import asyncio
+import functools
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+# Point WIKIPEDIA_API_URL at a local stand-in to run without network access
+WIKI_API_URL = os.getenv("WIKIPEDIA_API_URL", "https://en.wikipedia.org/w/api.php")
+WIKI_CACHE_PATH = os.getenv("WIKIPEDIA_CACHE_PATH", "cache/wikipedia.db")
+USER_AGENT = "test-agent"
+# The extracts API returns at most 20 intro extracts per request
+MAX_TITLES_PER_REQUEST = 20
+
+
+@dataclass
+class WikiCacheStats:
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    requests: int = 0
+
+
+def _query_params(titles: list[str]) -> dict[str, str]:
+    return {"action": "query", "format": "json", "formatversion": "2", "prop": "extracts", "exintro": "1",
+            "explaintext": "1", "redirects": "1", "titles": "|".join(titles)}
+
+
+def _parse_response(titles: list[str], data: dict) -> dict[str, Optional[str]]:
+    """Map each requested title to its page summary, or None if the page does not exist."""
+    query = data.get("query", {})
+    renamed = {item["from"]: item["to"] for item in query.get("normalized", []) + query.get("redirects", [])}
+    extracts = {page["title"]: page.get("extract") for page in query.get("pages", []) if not page.get("missing")}
+    results = {}
+    for title in titles:
+        resolved = title
+        # A title can be normalized and then redirected
+        while resolved in renamed and renamed[resolved] != resolved:
+            resolved = renamed[resolved]
+        results[title] = extracts.get(resolved) or None
+    return results
+
+
+class WikiPageCache:
+    """
+    Disk-backed cache of Wikipedia page summaries.
+
+    Summaries are kept for `ttl` seconds. Missing pages are cached too, for `negative_ttl` seconds,
+    so repeated lookups of a page that does not exist do not hit the API either. Misses are fetched
+    in batches of up to 20 titles per request.
+    """
+
+    def __init__(self, path: str = WIKI_CACHE_PATH, ttl: float = 7 * 24 * 60 * 60,
+                 negative_ttl: float = 24 * 60 * 60, api_url: str = WIKI_API_URL) -> None:
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.api_url = api_url
+        self._stats = WikiCacheStats()
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS pages (title TEXT PRIMARY KEY, summary TEXT, fetched_at REAL NOT NULL)")
+
+    def stats(self) -> dict[str, int]:
+        return asdict(self._stats)
+
+    def _lookup(self, titles: list[str]) -> dict[str, Optional[str]]:
+        """Return fresh cache entries for `titles`; titles that need fetching are left out."""
+        found = {}
+        now = time.time()
+        with self._lock:
+            for title in titles:
+                row = self._conn.execute("SELECT summary, fetched_at FROM pages WHERE title = ?", (title,)).fetchone()
+                if row is None:
+                    self._stats.misses += 1
+                elif row[0] is None and now - row[1] <= self.negative_ttl:
+                    self._stats.negative_hits += 1
+                    found[title] = None
+                elif row[0] is not None and now - row[1] <= self.ttl:
+                    self._stats.hits += 1
+                    found[title] = row[0]
+                else:
+                    self._stats.misses += 1
+        return found
+
+    def _store(self, results: dict[str, Optional[str]]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.executemany("INSERT OR REPLACE INTO pages (title, summary, fetched_at) VALUES (?, ?, ?)",
+                                   [(title, summary, now) for title, summary in results.items()])
+
+    def _batches(self, titles: list[str]) -> list[list[str]]:
+        return [titles[i:i + MAX_TITLES_PER_REQUEST] for i in range(0, len(titles), MAX_TITLES_PER_REQUEST)]
+
+    def get(self, title: str) -> Optional[str]:
+        """Return the summary of a page, fetching it on a cache miss; None if the page does not exist."""
+        return self.get_many([title])[title.strip()]
+
+    def get_many(self, titles: list[str]) -> dict[str, Optional[str]]:
+        import httpx
+
+        titles = list(dict.fromkeys(t.strip() for t in titles))
+        results = self._lookup(titles)
+        missing = [t for t in titles if t not in results]
+        if missing:
+            with httpx.Client(headers={"User-Agent": USER_AGENT}, timeout=30.0) as http:
+                for batch in self._batches(missing):
+                    response = http.get(self.api_url, params=_query_params(batch))
+                    response.raise_for_status()
+                    self._stats.requests += 1
+                    fetched = _parse_response(batch, response.json())
+                    self._store(fetched)
+                    results.update(fetched)
+        return results
+
+    async def aget_many(self, titles: list[str]) -> dict[str, Optional[str]]:
+        """Async `get_many`: the batches for cache misses are fetched concurrently."""
+        import httpx
+
+        titles = list(dict.fromkeys(t.strip() for t in titles))
+        results = self._lookup(titles)
+        missing = [t for t in titles if t not in results]
+        if missing:
+            async with httpx.AsyncClient(headers={"User-Agent": USER_AGENT}, timeout=30.0) as http:
+                async def fetch(batch: list[str]) -> dict[str, Optional[str]]:
+                    response = await http.get(self.api_url, params=_query_params(batch))
+                    response.raise_for_status()
+                    self._stats.requests += 1
+                    return _parse_response(batch, response.json())
+
+                for fetched in await asyncio.gather(*(fetch(batch) for batch in self._batches(missing))):
+                    self._store(fetched)
+                    results.update(fetched)
+        return results
+
+
+@functools.cache
+def get_default_wiki_cache() -> WikiPageCache:
+    """Process-wide cache shared by every MyWikiTool that is not given its own."""
+    return WikiPageCache()
@@ -0,0 +1,73 @@
+"""
+Exercise research_server's async, cached arXiv search against a local arXiv API stand-in.
+
+Compares sequential uncached searches, concurrent search_papers_many, and cache hits, with each API
+response taking API_DELAY seconds. Also checks that every request, including each page of a search
+spanning several pages, starts at least MIN_INTERVAL after the previous one.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.arxiv_search
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.stand_ins import ArxivHandler, StandInServer
+
+TOPICS = ["large language models", "retrieval augmented generation", "tool use", "agent planning"]
+MIN_INTERVAL = 0.2
+API_DELAY = 0.5
+# Results per query in the stand-in; a search for PAGED_RESULTS needs three pages of 100
+TOTAL_RESULTS = 300
+PAGED_RESULTS = 250
+
+
+async def main() -> None:
+    request_times = []
+    with StandInServer(ArxivHandler, delay=API_DELAY, total=TOTAL_RESULTS, request_times=request_times) as arxiv_api, \
+            tempfile.TemporaryDirectory() as paper_dir:
+        # research_server reads these when it is imported
+        os.environ["ARXIV_API_URL"] = f"{arxiv_api.url}/api/query"
+        os.environ["ARXIV_MIN_INTERVAL_SECONDS"] = str(MIN_INTERVAL)
+        from tools import research_server
+
+        research_server.PAPER_DIR = paper_dir
+        research_server.PAPER_DB = os.path.join(paper_dir, "papers.db")
+
+        start = time.perf_counter()
+        for topic in TOPICS:
+            await research_server.search_papers(topic, max_results=5, sort_by="submitted")
+        sequential = time.perf_counter() - start
+
+        start = time.perf_counter()
+        many = await research_server.search_papers_many(TOPICS, max_results=5)
+        concurrent = time.perf_counter() - start
+        assert all(result.total == 5 for result in many.values())
+
+        requests_before = arxiv_api.request_count
+        start = time.perf_counter()
+        await research_server.search_papers_many(TOPICS, max_results=5)
+        cached = time.perf_counter() - start
+        assert arxiv_api.request_count == requests_before, "cached searches must not hit the API"
+
+        requests_before = arxiv_api.request_count
+        start = time.perf_counter()
+        paged = await research_server.search_papers("many pages", max_results=PAGED_RESULTS)
+        paged_seconds = time.perf_counter() - start
+        assert paged.total == PAGED_RESULTS
+        pages = arxiv_api.request_count - requests_before
+
+        gaps = [later - earlier for earlier, later in zip(request_times, request_times[1:])]
+        assert min(gaps) >= MIN_INTERVAL - 0.01, f"requests {min(gaps):.3f}s apart"
+
+        print(f"rate limit: one request per {MIN_INTERVAL}s, API responses take {API_DELAY}s")
+        print(f"{len(TOPICS)} topics, search_papers one by one: {sequential:.3f}s")
+        print(f"{len(TOPICS)} topics, search_papers_many:       {concurrent:.3f}s")
+        print(f"{len(TOPICS)} topics, cached:                   {cached:.3f}s")
+        print(f"{PAGED_RESULTS} results, {pages} pages:               {paged_seconds:.3f}s")
+        print(f"API requests made: {arxiv_api.request_count}, at least {min(gaps):.3f}s apart")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
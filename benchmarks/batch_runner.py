@@ -0,0 +1,94 @@
+"""
+Batch runner check against local DuckDuckGo and chat completions stand-ins.
+
+Runs the research agent over a JSONL file with duplicate queries, kills the job part way through,
+resumes it, and checks that every item has exactly one answer and finished items were not run again.
+Also compares throughput with one query in flight against the default concurrency.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.batch_runner [items]
+"""
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from argparse import Namespace
+from collections import Counter
+
+from benchmarks.stand_ins import ChatCompletionsHandler, DuckDuckGoHandler, StandInServer
+
+CONCURRENCY = 16
+DUPLICATE_SHARE = 0.2
+ANSWER = " ".join(["The sources agree that progress in this area is steady and well documented."] * 3)
+
+
+def write_queries(path: str, count: int) -> int:
+    """Write `count` queries, about DUPLICATE_SHARE of them repeats in varied case; returns unique queries."""
+    rng = random.Random(1)
+    unique = [f"Recent developments in topic {i}" for i in range(int(count * (1 - DUPLICATE_SHARE)))]
+    queries = unique + [rng.choice(unique).upper() for _ in range(count - len(unique))]
+    rng.shuffle(queries)
+    with open(path, "w", encoding="utf-8") as f:
+        for i, query in enumerate(queries):
+            f.write(json.dumps({"id": f"q{i}", "query": query}) + "\n")
+    return len(unique)
+
+
+def run_job(env: dict, input_path: str, output_path: str, kill_after: float | None = None) -> str:
+    command = [sys.executable, "-m", "ai_agent_experiments.batch_runner", input_path, output_path,
+               "--agent", "research", "--concurrency", str(CONCURRENCY),
+               "--prompt-price", "2.5", "--completion-price", "10"]
+    process = subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    if kill_after is not None:
+        time.sleep(kill_after)
+        process.send_signal(signal.SIGKILL)
+    output, _ = process.communicate()
+    return output
+
+
+def main(count: int) -> None:
+    with StandInServer(DuckDuckGoHandler, delay=0.01) as search_api, \
+            StandInServer(ChatCompletionsHandler, responder=lambda request: ANSWER, chunk_delay=0.002) as model_api, \
+            tempfile.TemporaryDirectory() as work_dir:
+        env = dict(os.environ, DUCKDUCKGO_API_URL=search_api.url, AZURE_OPENAI_ENDPOINT=model_api.url,
+                   AZURE_OPENAI_API_KEY="stand-in", AZURE_OPENAI_API_VERSION="2024-10-21",
+                   AZURE_OPENAI_DEPLOYMENT="stand-in")
+        input_path, output_path = os.path.join(work_dir, "queries.jsonl"), os.path.join(work_dir, "results.jsonl")
+        unique = write_queries(input_path, count)
+
+        run_job(env, input_path, output_path, kill_after=3.0)
+        with open(output_path, encoding="utf-8") as f:
+            before_kill = sum(1 for _ in f)
+        print(f"{count} items ({unique} unique queries); killed the job after {before_kill} results")
+
+        summary = run_job(env, input_path, output_path)
+        print(f"resumed job, concurrency {CONCURRENCY}:\n{summary}")
+
+        with open(output_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+        answered = Counter(record["id"] for record in records if record["error"] is None)
+        assert len(answered) == count and set(answered.values()) == {1}, "every item must be answered exactly once"
+        redone = model_api.request_count - unique
+        print(f"\nchecked: {count} items answered once each; {model_api.request_count} model requests for "
+              f"{unique} unique queries ({redone} redone because they were in flight when the job was killed)")
+
+        # Throughput with a single query in flight, for comparison, on a slice of the same queries
+        from ai_agent_experiments import batch_runner
+
+        os.environ.update(env)
+        sample_path = os.path.join(work_dir, "sample.jsonl")
+        with open(input_path, encoding="utf-8") as source, open(sample_path, "w", encoding="utf-8") as sample:
+            sample.writelines(line for _, line in zip(range(100), source))
+        sequential = asyncio.run(batch_runner.main(Namespace(
+            config="./config.json", agent="research", input=sample_path, concurrency=1,
+            output=os.path.join(work_dir, "sequential.jsonl"))))
+        print(f"\nconcurrency 1, first 100 items:\n{sequential.report(2.5, 10)}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
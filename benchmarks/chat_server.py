@@ -0,0 +1,121 @@
+"""
+Load test for the multi-session chat server (ai_agent_experiments/chat_server.py).
+
+The server runs in-process on uvicorn and talks to a local chat completions stand-in. A stdio
+HelloService stands in for the research MCP server. The test reports:
+  - sessions/sec: create a session, send one message and read the streamed answer, many clients at once
+  - memory per idle session (tracemalloc)
+  - backpressure: concurrent turns beyond max_active_turns get 503, a second turn on a busy session gets 409
+  - idle eviction
+
+Usage (from the project root):
+    poetry run python -m benchmarks.chat_server [sessions] [clients]
+"""
+import asyncio
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from collections import Counter
+
+import httpx
+import uvicorn
+
+from ai_agent_experiments.chat_server import ChatServerSettings, create_app
+from ai_agent_experiments.config import get_configuration
+from ai_agent_experiments.mcp_stdio_client import McpStdioClient
+from benchmarks.stand_ins import ChatCompletionsHandler, StandInServer
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ANSWER = "Hello! I am Bot, happy to help with whatever is on your mind today."
+IDLE_SESSIONS = 2000
+MAX_ACTIVE_TURNS = 8
+
+
+def hello_mcp_client(index: int) -> McpStdioClient:
+    return McpStdioClient(f"hello-{index}", sys.executable, ["-m", "tools.hello_service"],
+                          {"PYTHONPATH": PROJECT_ROOT})
+
+
+async def _conversation(http: httpx.AsyncClient) -> str:
+    response = await http.post("/sessions")
+    session_id = response.json()["session_id"]
+    async with http.stream("POST", f"/sessions/{session_id}/messages", json={"message": "Hi there"}) as response:
+        response.raise_for_status()
+        answer = "".join([chunk async for chunk in response.aiter_text()])
+    assert answer == ANSWER, answer
+    return session_id
+
+
+async def _turn_status(http: httpx.AsyncClient, session_id: str) -> int:
+    async with http.stream("POST", f"/sessions/{session_id}/messages", json={"message": "Hi"}) as response:
+        await response.aread()
+        return response.status_code
+
+
+async def main(total_sessions: int, clients: int) -> None:
+    with StandInServer(ChatCompletionsHandler, responder=lambda request: ANSWER, chunk_delay=0.0) as model_api:
+        config = get_configuration("./config.json")
+        config.azure_open_ai_config.update(api_key="stand-in", azure_endpoint=model_api.url,
+                                           api_version="2024-10-21", model="stand-in")
+        settings = ChatServerSettings(max_active_turns=MAX_ACTIVE_TURNS, mcp_pool_size=1)
+        app = create_app(config, settings, mcp_client_factory=hello_mcp_client)
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+        server_task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.05)
+        port = server.servers[0].sockets[0].getsockname()[1]
+        sessions = app.state.sessions
+
+        limits = httpx.Limits(max_connections=clients * 2)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as http:
+            await _conversation(http)
+
+            # Sessions/sec with `clients` conversations in flight
+            remaining = total_sessions
+
+            async def client() -> None:
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    await _conversation(http)
+
+            start = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(min(clients, MAX_ACTIVE_TURNS))))
+            elapsed = time.perf_counter() - start
+            print(f"{total_sessions} sessions (create + one streamed turn), {min(clients, MAX_ACTIVE_TURNS)} clients: "
+                  f"{total_sessions / elapsed:.0f} sessions/sec")
+
+            # Memory held per idle session, each with one exchange in its history
+            gc.collect()
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            for _ in range(IDLE_SESSIONS // MAX_ACTIVE_TURNS):
+                await asyncio.gather(*(_conversation(http) for _ in range(MAX_ACTIVE_TURNS)))
+            gc.collect()
+            per_session = (tracemalloc.get_traced_memory()[0] - before) / IDLE_SESSIONS
+            tracemalloc.stop()
+            print(f"memory per idle session: {per_session / 1024:.1f} KiB ({len(sessions)} sessions open)")
+
+            # Backpressure: slow the model down and start more turns than max_active_turns
+            model_api.httpd.chunk_delay = 0.02
+            session_ids = [(await http.post("/sessions")).json()["session_id"] for _ in range(clients)]
+            statuses = Counter(await asyncio.gather(*(_turn_status(http, sid) for sid in session_ids)))
+            print(f"{clients} concurrent turns, max_active_turns={MAX_ACTIVE_TURNS}: "
+                  + ", ".join(f"{count} x {status}" for status, count in sorted(statuses.items())))
+            statuses = Counter(await asyncio.gather(*(_turn_status(http, session_ids[0]) for _ in range(2))))
+            print("two concurrent turns on one session: "
+                  + ", ".join(f"{count} x {status}" for status, count in sorted(statuses.items())))
+
+        # Idle eviction
+        open_sessions = len(sessions)
+        sessions.settings.idle_timeout = 0
+        print(f"evicted {sessions.evict_idle()} of {open_sessions} idle sessions")
+
+        server.should_exit = True
+        await server_task
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, int(sys.argv[2]) if len(sys.argv) > 2 else 32))
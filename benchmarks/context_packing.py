@@ -0,0 +1,117 @@
+"""
+Prompt tokens per RAG turn and answer-bearing recall: the old generate_rag_response (raw top-3 chunks,
+every augmented question kept in history) versus pack_context + answer_with_context.
+
+The offline corpus mimics chunked documents: each topic has two answer-bearing paragraphs, one of which
+appears three times with small edits (the same paragraph in an FAQ, a manual and a web page). Each
+question needs both paragraphs. Embeddings come from the hashed bag-of-words stand-in, answers from the
+chat completions stand-in.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.context_packing
+"""
+import json
+import random
+import statistics
+import tempfile
+import time
+
+from openai import AzureOpenAI
+from openai.types import Embedding
+
+from ai_agent_experiments.config import get_configuration
+from ai_agent_experiments.context_packing import answer_with_context, pack_context
+from ai_agent_experiments.faiss_store import PersistentFaissStore
+from benchmarks.stand_ins import ChatCompletionsHandler, StandInServer, hashed_embeddings
+
+TOPICS = 40
+TURNS = 8
+TOKEN_BUDGET = 400
+SYSTEM = {"role": "system", "content": "You answer questions based on the context provided."}
+FILLER = ("the users product team release support feature settings account screen option mobile desktop "
+          "version update page guide note step help menu music library playlist share service plan").split()
+
+
+def _word(rng: random.Random) -> str:
+    return "".join(rng.choice(["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "ze", "qu"]) for _ in range(4))
+
+
+def make_corpus() -> tuple[list[str], list[tuple[str, set[str]]]]:
+    """Returns (chunks, [(question, opening words of its answer-bearing paragraphs)])."""
+    rng = random.Random(7)
+    chunks, questions = [], []
+    for topic in range(TOPICS):
+        name = _word(rng)
+        first, second = [_word(rng) for _ in range(20)], [_word(rng) for _ in range(20)]
+        paragraph = [name] + first + rng.sample(FILLER, 20) + rng.sample(FILLER, 20)
+        other = [name] + second + rng.sample(FILLER, 20) + rng.sample(FILLER, 20)
+        variants = []
+        for _ in range(3):
+            words = list(paragraph)
+            for position in rng.sample(range(21, len(words)), 3):
+                words[position] = rng.choice(FILLER)
+            variants.append(" ".join(words) + ".")
+        chunks.extend(variants)
+        chunks.append(" ".join(other) + ".")
+        question = f"What does {name} do with {' '.join(first[:6])} and {' '.join(second[:4])}?"
+        # The opening words identify each answer-bearing paragraph
+        questions.append((question, {f"{name} {first[0]}", f"{name} {second[0]}"}))
+    return chunks, questions
+
+
+def _answered(context: str, gold: set[str]) -> float:
+    return sum(key in context for key in gold) / len(gold)
+
+
+def main() -> None:
+    prompt_tokens = []
+
+    def responder(request: dict) -> str:
+        # Counted the way the stand-in counts usage
+        prompt_tokens.append(len(json.dumps(request["messages"])) // 4)
+        return "Here is what the context says."
+
+    with StandInServer(ChatCompletionsHandler, responder=responder) as model_api, \
+            tempfile.TemporaryDirectory() as store_dir:
+        config = get_configuration("./config.json")
+        config.faiss_server_config.update(path=store_dir, dimension=512)
+        store = PersistentFaissStore(config)
+        chunks, questions = make_corpus()
+        store.add_embedding_vectors(hashed_embeddings(chunks), chunks)
+
+        client = AzureOpenAI(api_key="stand-in", azure_endpoint=model_api.url, api_version="2024-10-21")
+        turns = random.Random(3).sample(questions, TURNS)
+
+        # Before: top-3 chunks, and the question with its context stays in the history
+        messages, recall = [SYSTEM], []
+        for question, gold in turns:
+            retrieved = store.search(Embedding(embedding=hashed_embeddings([question])[0].tolist(), index=0,
+                                               object="embedding"), top_k=3)
+            context = "\n\n".join(chunk["chunk"] for chunk in retrieved)
+            messages.append({"role": "user", "content": f"\n    Context:{context}\n    Question: {question}\n    "})
+            response = client.chat.completions.create(model="stand-in", messages=messages)
+            messages.append({"role": "assistant", "content": response.choices[0].message.content})
+            recall.append(_answered(context, gold))
+        tokens = prompt_tokens[-TURNS:]
+        print(f"{'':<14}{'prompt tokens/turn':>20}{'last turn':>11}{'answer recall':>15}{'pack ms':>9}")
+        print(f"{'top-3, kept':<14}{statistics.mean(tokens):>20.0f}{tokens[-1]:>11}{statistics.mean(recall):>15.0%}"
+              f"{'':>9}")
+
+        # After: packed context, sent with the current question only
+        history, recall, pack_times, duplicates = [SYSTEM], [], [], 0
+        for question, gold in turns:
+            query = hashed_embeddings([question])[0]
+            start = time.perf_counter()
+            packed = pack_context(store, query, token_budget=TOKEN_BUDGET, fetch_k=20)
+            pack_times.append(time.perf_counter() - start)
+            duplicates += packed.duplicates
+            answer_with_context(client, "stand-in", history, question, packed.text)
+            recall.append(_answered(packed.text, gold))
+        tokens = prompt_tokens[-TURNS:]
+        print(f"{'packed':<14}{statistics.mean(tokens):>20.0f}{tokens[-1]:>11}{statistics.mean(recall):>15.0%}"
+              f"{statistics.mean(pack_times) * 1000:>9.2f}")
+        print(f"\ntoken budget {TOKEN_BUDGET}, {duplicates} near-duplicate chunks dropped over {TURNS} turns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Import-time budget check.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter for each module below and
+fails (exit code 1) if the cumulative import time exceeds its budget, or if a heavy dependency that
+should be deferred shows up at import time.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.import_time
+"""
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+
+RUNS = 3
+# Scale all budgets, e.g. IMPORT_BUDGET_SCALE=2 on a slow CI machine
+BUDGET_SCALE = float(os.getenv("IMPORT_BUDGET_SCALE", "1"))
+
+
+@dataclass
+class ImportBudget:
+    module: str
+    budget_ms: float
+    forbidden: list[str] = field(default_factory=list)
+
+
+BUDGETS = [
+    ImportBudget("ai_agent_experiments.config", 150),
+    ImportBudget("ai_agent_experiments.utils", 200, ["pandas", "IPython", "anthropic", "openai"]),
+    ImportBudget("ai_agent_experiments.mcp_stdio_client", 1500, ["openai"]),
+    ImportBudget("tools.research_server", 2000, ["arxiv", "feedparser"]),
+    # The CLI entry chain: main.py -> lesson_04_tool_calling_mcp -> mcp_stdio_client
+    ImportBudget("ai_agent_experiments.lesson_04_tool_calling_mcp", 1500, ["openai"]),
+    ImportBudget("main", 1500, ["openai", "faiss", "langchain"]),
+]
+
+
+def measure(module: str) -> tuple[float, set[str]]:
+    """Return (cumulative import time in ms, top-level packages imported) for one fresh interpreter."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          capture_output=True, text=True, cwd=os.getcwd())
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr}")
+    total_us = 0
+    imported = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header line
+        name = name.strip()
+        imported.add(name.split(".")[0])
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1000, imported
+
+
+def main() -> int:
+    failures = []
+    for budget in BUDGETS:
+        best_ms = float("inf")
+        imported: set[str] = set()
+        for _ in range(RUNS):
+            elapsed_ms, imported = measure(budget.module)
+            best_ms = min(best_ms, elapsed_ms)
+        limit_ms = budget.budget_ms * BUDGET_SCALE
+        leaked = sorted(set(budget.forbidden) & imported)
+        status = "ok" if best_ms <= limit_ms and not leaked else "FAIL"
+        print(f"{status:4} {budget.module:50} {best_ms:8.1f} ms (budget {limit_ms:.0f} ms)"
+              + (f" eagerly imports {leaked}" if leaked else ""))
+        if status != "ok":
+            failures.append(budget.module)
+    if failures:
+        print(f"Import-time budget exceeded for: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
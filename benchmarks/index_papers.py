@@ -0,0 +1,71 @@
+"""
+Run research_server's index_papers pipeline over local PDF fixtures served by a stand-in HTTP server.
+
+PDFs are generated with PyMuPDF, embeddings come from a deterministic offline embedder, and the FAISS
+store is written to a temporary directory. The second pass must skip every paper by content hash.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.index_papers [number_of_papers]
+"""
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.stand_ins import FileHandler, StandInServer
+
+DIMENSION = 64
+
+
+def make_pdf(paper_id: str, pages: int = 5) -> bytes:
+    import fitz
+
+    doc = fitz.open()
+    for page_number in range(pages):
+        page = doc.new_page()
+        text = f"Paper {paper_id}, page {page_number}. " + "Agents call tools and reflect on results. " * 40
+        page.insert_textbox(fitz.Rect(50, 50, 550, 800), text, fontsize=9)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+async def fake_embed(texts: list[str]) -> list[list[float]]:
+    vectors = []
+    for text in texts:
+        digest = hashlib.sha256(text.encode("utf-8")).digest()
+        vectors.append([(digest[i % len(digest)] - 128) / 128 for i in range(DIMENSION)])
+    return vectors
+
+
+async def main(paper_count: int) -> None:
+    paper_ids = [f"2501.{i:05d}" for i in range(paper_count)]
+    files = {f"/pdf/{paper_id}": make_pdf(paper_id) for paper_id in paper_ids}
+    with StandInServer(FileHandler, files=files) as pdf_server, tempfile.TemporaryDirectory() as work_dir:
+        # research_server and the FAISS store read these when they are first used
+        os.environ["ARXIV_PDF_URL"] = f"{pdf_server.url}/pdf"
+        os.environ["FAISS_EMBEDDINGS_SAVE_PATH"] = os.path.join(work_dir, "faiss")
+        os.environ["FAISS_EMBEDDINGS_DIMENSION"] = str(DIMENSION)
+        from tools import research_server
+
+        research_server.PAPER_DIR = work_dir
+        research_server.PAPER_DB = os.path.join(work_dir, "papers.db")
+
+        async def report(done: int, total: int) -> None:
+            print(f"\r  progress {done}/{total}", end="", flush=True)
+
+        for label in ("first pass", "second pass"):
+            start = time.perf_counter()
+            summary = await research_server._index_papers(paper_ids, embed=fake_embed, report=report)
+            elapsed = time.perf_counter() - start
+            print(f"\n{label}: {len(summary['indexed'])} indexed, {len(summary['skipped'])} skipped, "
+                  f"{len(summary['failed'])} failed, {summary['chunks']} chunks in {elapsed:.2f}s")
+            if summary["failed"]:
+                print(summary["failed"])
+        assert len(summary["skipped"]) == paper_count, "already-indexed PDFs must be skipped"
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 16))
@@ -0,0 +1,243 @@
+"""
+MCP round-trip load generator: N concurrent client sessions with M calls in flight each, against
+tools/hello_service.py and tools/research_server.py (arXiv stubbed by a local stand-in), over stdio and
+streamable HTTP.
+
+Reports calls/sec, p50/p99 `use_tool` latency, client and server CPU per call, and the per-call cost
+of JSON-RPC serialization and result normalization measured in isolation. Server CPU is read from
+/proc, so this benchmark is Linux-only.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.mcp_roundtrip [--sessions N] [--inflight M] [--calls C]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+
+from mcp.types import CallToolResult, JSONRPCMessage, JSONRPCRequest, JSONRPCResponse
+
+from ai_agent_experiments.mcp_stdio_client import McpStdioClient, normalize_tool_result
+from ai_agent_experiments.mcp_streamable_client import MCPStreamableClient
+from benchmarks.stand_ins import ArxivHandler, StandInServer
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+@dataclass
+class Target:
+    name: str
+    module: str
+    tool: str
+    args: dict
+    http_args: list[str]
+    http_path: str
+
+
+TARGETS = [
+    Target("hello", "tools.hello_service", "say_hello", {"username": "bench"}, ["http", "{port}"], "/mcp/"),
+    # After the warm-up call the search is answered from the paper store's cache
+    Target("research", "tools.research_server", "search_papers", {"topic": "agents", "max_results": 5},
+           ["streamable-http", "{port}"], "/mcp"),
+]
+
+
+@dataclass
+class RunStats:
+    calls: int
+    seconds: float
+    latencies: list[float]
+    client_cpu: float
+    server_cpu: float
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _descendants(pid: int) -> list[int]:
+    children = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children + [grandchild for child in children for grandchild in _descendants(child)]
+
+
+def _server_cpu() -> float:
+    """User + system CPU seconds of every process started by this one (the MCP servers)."""
+    total = 0
+    for pid in _descendants(os.getpid()):
+        with contextlib.suppress(FileNotFoundError, ProcessLookupError):
+            with open(f"/proc/{pid}/stat") as f:
+                # The command name can contain spaces; the fields we need follow its closing paren
+                fields = f.read().rsplit(")", 1)[1].split()
+            total += int(fields[11]) + int(fields[12])
+    return total / CLOCK_TICKS
+
+
+def _client_cpu() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _server_env(arxiv_url: str) -> dict[str, str]:
+    return {"PYTHONPATH": PROJECT_ROOT, "ARXIV_API_URL": f"{arxiv_url}/api/query", "ARXIV_MIN_INTERVAL_SECONDS": "0",
+            "MCP_LOG_LEVEL": "WARNING"}
+
+
+async def _wait_for_port(port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def _drive(client, target: Target, inflight: int, calls: int) -> list[float]:
+    latencies = []
+    remaining = calls
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            await client.use_tool(target.tool, target.args)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(inflight)))
+    return latencies
+
+
+async def _measure(clients: list, target: Target, inflight: int, calls: int) -> RunStats:
+    # One warm-up call per session primes imports, connections and the research server's search cache
+    for client in clients:
+        await client.use_tool(target.tool, target.args)
+    client_before, server_before = _client_cpu(), _server_cpu()
+    start = time.perf_counter()
+    results = await asyncio.gather(*(_drive(client, target, inflight, calls) for client in clients))
+    seconds = time.perf_counter() - start
+    latencies = [latency for session in results for latency in session]
+    return RunStats(len(latencies), seconds, latencies, _client_cpu() - client_before, _server_cpu() - server_before)
+
+
+async def _run_stdio(target: Target, arxiv_url: str, sessions: int, inflight: int, calls: int) -> RunStats:
+    # stdio gives every session its own server process
+    clients = [McpStdioClient(f"{target.name}-{i}", sys.executable, ["-m", target.module], _server_env(arxiv_url))
+               for i in range(sessions)]
+    # Clients must be connected and disconnected from the same task, so connect them one by one
+    with contextlib.redirect_stdout(io.StringIO()):
+        for client in clients:
+            await client.connect()
+    try:
+        return await _measure(clients, target, inflight, calls)
+    finally:
+        for client in reversed(clients):
+            await client.disconnect()
+
+
+async def _run_http(target: Target, arxiv_url: str, sessions: int, inflight: int, calls: int) -> RunStats:
+    # All sessions share one server process
+    port = _free_port()
+    env = dict(os.environ, **_server_env(arxiv_url))
+    args = [arg.format(port=port) for arg in target.http_args]
+    server = subprocess.Popen([sys.executable, "-m", target.module, *args], env=env)
+    try:
+        await _wait_for_port(port)
+        clients = [MCPStreamableClient(f"{target.name}-{i}", f"http://127.0.0.1:{port}{target.http_path}")
+                   for i in range(sessions)]
+        for client in clients:
+            await client.connect()
+        try:
+            return await _measure(clients, target, inflight, calls)
+        finally:
+            for client in reversed(clients):
+                await client.disconnect()
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _per_call_us(function, iterations: int = 2000) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        function()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+async def _serialization_cost(target: Target, arxiv_url: str) -> dict[str, float]:
+    """Per-call cost of the JSON-RPC encode/decode steps and use_tool normalization, outside any I/O."""
+    client = McpStdioClient(target.name, sys.executable, ["-m", target.module], _server_env(arxiv_url))
+    with contextlib.redirect_stdout(io.StringIO()):
+        await client.connect()
+    try:
+        result = await client._session.call_tool(target.tool, target.args)
+    finally:
+        await client.disconnect()
+
+    request = JSONRPCMessage(JSONRPCRequest(jsonrpc="2.0", id=1, method="tools/call",
+                                            params={"name": target.tool, "arguments": target.args}))
+    response = JSONRPCMessage(JSONRPCResponse(jsonrpc="2.0", id=1,
+                                              result=result.model_dump(by_alias=True, mode="json", exclude_none=True)))
+    request_wire = request.model_dump_json(by_alias=True, exclude_none=True)
+    response_wire = response.model_dump_json(by_alias=True, exclude_none=True)
+
+    def decode_response() -> CallToolResult:
+        return CallToolResult.model_validate(JSONRPCMessage.model_validate_json(response_wire).root.result)
+
+    return {
+        "encode request": _per_call_us(lambda: request.model_dump_json(by_alias=True, exclude_none=True)),
+        "decode request": _per_call_us(lambda: JSONRPCMessage.model_validate_json(request_wire)),
+        "encode response": _per_call_us(lambda: response.model_dump_json(by_alias=True, exclude_none=True)),
+        "decode response": _per_call_us(decode_response),
+        "normalize result": _per_call_us(lambda: normalize_tool_result(result)),
+        "response bytes": len(response_wire),
+    }
+
+
+async def main(sessions: int, inflight: int, calls: int) -> None:
+    with StandInServer(ArxivHandler) as arxiv_api, tempfile.TemporaryDirectory() as work_dir:
+        # research_server keeps its papers and paper store under the working directory
+        os.chdir(work_dir)
+        print(f"{sessions} sessions x {inflight} calls in flight, {calls} calls per session\n")
+        print(f"{'target':<10}{'transport':<11}{'calls/sec':>10}{'p50 ms':>9}{'p99 ms':>9}"
+              f"{'client CPU us/call':>20}{'server CPU us/call':>20}")
+        for target in TARGETS:
+            for transport, run in (("stdio", _run_stdio), ("http", _run_http)):
+                stats = await run(target, arxiv_api.url, sessions, inflight, calls)
+                percentiles = statistics.quantiles(stats.latencies, n=100)
+                print(f"{target.name:<10}{transport:<11}{stats.calls / stats.seconds:>10.0f}"
+                      f"{percentiles[49] * 1000:>9.2f}{percentiles[98] * 1000:>9.2f}"
+                      f"{stats.client_cpu / stats.calls * 1e6:>20.0f}{stats.server_cpu / stats.calls * 1e6:>20.0f}")
+
+        print("\nserialization per call (us), measured in isolation")
+        for target in TARGETS:
+            cost = await _serialization_cost(target, arxiv_api.url)
+            print(f"{target.name:<10}" + "  ".join(f"{name} {value:.1f}" if name != "response bytes"
+                                                     else f"{name} {value}" for name, value in cost.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--inflight", type=int, default=8)
+    parser.add_argument("--calls", type=int, default=200)
+    options = parser.parse_args()
+    asyncio.run(main(options.sessions, options.inflight, options.calls))
@@ -0,0 +1,143 @@
+"""
+Prompt caching: latency, cached share of prompt tokens and cost of repeated static prefixes.
+
+- ChatBot with 50 tools over several turns of one conversation, against the chat completions stand-in
+  with OpenAI-style automatic prefix caching: no provider cache, tools arriving in a different order
+  every turn (as when several MCP servers answer in any order), and stable_tools.
+- Chart reflection over Anthropic, sending the same chart with three different prompts: the previous
+  layout (prompt before the image, nothing marked cacheable) versus utils.image_anthropic_call.
+
+Prompt processing in the stand-ins costs `PROMPT_TOKEN_DELAY` seconds per uncached token. Prices are
+USD per million tokens.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.prompt_cache
+"""
+import asyncio
+import contextlib
+import os
+import random
+import statistics
+import time
+from unittest import mock
+
+from openai import AsyncAzureOpenAI
+
+from ai_agent_experiments import lesson_04_tool_calling_mcp
+from ai_agent_experiments.config import get_configuration
+from ai_agent_experiments.lesson_04_tool_calling_mcp import ChatBot
+from ai_agent_experiments.prompt_cache import CacheUsage
+from benchmarks.mcp_roundtrip import PROJECT_ROOT
+from benchmarks.stand_ins import AnthropicMessagesHandler, ChatCompletionsHandler, StandInServer
+from benchmarks.tool_router import StaticTools, make_tools
+
+TOOLS = 50
+TURNS = 8
+PROMPT_TOKEN_DELAY = 0.0001
+# gpt-4o: input, cached input, output
+OPENAI_PRICES = (2.50, 1.25, 10.0)
+# Claude Sonnet: input, cache write, cache read, output
+ANTHROPIC_PRICES = (3.0, 3.75, 0.30, 15.0)
+QUESTIONS = [f"Question {i}: what changed in the {topic} settings last week?"
+             for i, topic in enumerate(["calendar", "invoice", "ticket", "email", "payroll", "inventory", "dns", "crm"])]
+CHART_PROMPTS = [f"Critique round {i}: check the {focus}, then return improved matplotlib code. " + "Constraints apply. " * 60
+                 for i, focus in enumerate(["legend", "axis labels", "colors"])]
+
+
+class ShuffledTools(StaticTools):
+    """The same tools in a different order on every call."""
+
+    async def get_available_tools(self) -> list:
+        return random.sample(self.tools, len(self.tools))
+
+
+async def chat_turns(model_api: StandInServer, mcp_client) -> tuple[CacheUsage, list[float]]:
+    config = get_configuration("./config.json")
+    client = AsyncAzureOpenAI(api_key="stand-in", azure_endpoint=model_api.url, api_version="2024-10-21")
+    bot = ChatBot(config, client=client, mcp_client=mcp_client)
+    latencies = []
+    for question in QUESTIONS[:TURNS]:
+        start = time.perf_counter()
+        await bot.run(question)
+        latencies.append(time.perf_counter() - start)
+    await client.close()
+    return bot.usage, latencies
+
+
+def openai_cost(usage: CacheUsage) -> float:
+    input_price, cached_price, output_price = OPENAI_PRICES
+    return ((usage.prompt_tokens - usage.cached_tokens) * input_price + usage.cached_tokens * cached_price
+            + usage.completion_tokens * output_price) / 1e6
+
+
+def anthropic_cost(usage: CacheUsage) -> float:
+    input_price, write_price, read_price, output_price = ANTHROPIC_PRICES
+    uncached = usage.prompt_tokens - usage.cached_tokens - usage.cache_write_tokens
+    return (uncached * input_price + usage.cache_write_tokens * write_price + usage.cached_tokens * read_price
+            + usage.completion_tokens * output_price) / 1e6
+
+
+def print_row(label: str, usage: CacheUsage, latencies: list[float], cost: float) -> None:
+    print(f"{label:<26}{usage.prompt_tokens / len(latencies):>15.0f}{usage.hit_rate:>9.0%}"
+          f"{statistics.mean(latencies) * 1000:>12.0f}{cost / len(latencies) * 1e6:>16.0f}")
+
+
+def previous_image_call(client, model_name: str, prompt: str, media_type: str, b64: str):
+    # image_anthropic_call before prompt caching: prompt first, then the image, nothing cacheable
+    from ai_agent_experiments.utils import JSON_ONLY_SYSTEM_PROMPT
+
+    return client.messages.create(model=model_name, max_tokens=2000, temperature=0, system=JSON_ONLY_SYSTEM_PROMPT,
+                                  messages=[{"role": "user", "content": [
+                                      {"type": "text", "text": prompt},
+                                      {"type": "image", "source": {"type": "base64", "media_type": media_type,
+                                                                   "data": b64}}]}])
+
+
+def chart_rounds(anthropic_api: StandInServer) -> None:
+    from ai_agent_experiments import utils
+    from ai_agent_experiments.prompt_cache import cache_usage
+
+    os.environ.update(ANTHROPIC_BASE_URL=anthropic_api.url, ANTHROPIC_API_KEY="stand-in")
+    b64 = "iVBORw0KGgo" * 100
+    # utils reads ../config.json, relative to the notebooks' directory
+    with contextlib.chdir(os.path.join(PROJECT_ROOT, "ai_agent_experiments")):
+        client = utils.get_anthropic_client()
+        for label, call in (("prompt, then image", None), ("image_anthropic_call", utils.image_anthropic_call)):
+            anthropic_api.httpd.prompt_cache.clear()
+            usage, latencies = CacheUsage() if call is None else cache_usage, []
+            for prompt in CHART_PROMPTS:
+                start = time.perf_counter()
+                if call is None:
+                    usage.record(previous_image_call(client, "claude-sonnet-4-5", prompt, "image/png", b64).usage)
+                else:
+                    call("claude-sonnet-4-5", prompt, "image/png", b64)
+                latencies.append(time.perf_counter() - start)
+            print_row(label, usage, latencies, anthropic_cost(usage))
+
+
+async def main() -> None:
+    tools = make_tools(TOOLS)
+    header = f"{'':<26}{'prompt tokens':>15}{'cached':>9}{'latency ms':>12}{'cost/turn uUSD':>16}"
+    print(f"ChatBot, {TOOLS} tools, {TURNS} turns of one conversation\n{header}")
+    with StandInServer(ChatCompletionsHandler, responder=lambda request: "Nothing changed.",
+                       prompt_token_delay=PROMPT_TOKEN_DELAY) as model_api:
+        usage, latencies = await chat_turns(model_api, StaticTools(tools))
+        print_row("no provider cache", usage, latencies, openai_cost(usage))
+    with StandInServer(ChatCompletionsHandler, responder=lambda request: "Nothing changed.",
+                       prompt_token_delay=PROMPT_TOKEN_DELAY, prefix_cache=set()) as model_api:
+        # As before stable_tools: tools are sent in whatever order the MCP client returned them
+        with mock.patch.object(lesson_04_tool_calling_mcp, "stable_tools", list):
+            usage, latencies = await chat_turns(model_api, ShuffledTools(tools))
+        print_row("cache, tools in any order", usage, latencies, openai_cost(usage))
+        model_api.httpd.prefix_cache.clear()
+        usage, latencies = await chat_turns(model_api, ShuffledTools(tools))
+        print_row("cache, stable_tools", usage, latencies, openai_cost(usage))
+
+    print(f"\nChart reflection over Anthropic, one chart, {len(CHART_PROMPTS)} prompts\n{header}")
+    with StandInServer(AnthropicMessagesHandler, responder=lambda request: '{"feedback": "ok"}',
+                       prompt_token_delay=PROMPT_TOKEN_DELAY, prompt_cache={}) as anthropic_api:
+        chart_rounds(anthropic_api)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
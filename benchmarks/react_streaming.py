@@ -0,0 +1,73 @@
+"""
+Compare the ReAct loop that waits for full completions with the streaming loop that stops at PAUSE
+and dispatches the action as soon as its line arrives, against a local chat completions stand-in.
+
+The stand-in model behaves like a chatty real one: after `PAUSE` it keeps going with a made-up
+observation and more reasoning unless a stop sequence cuts it off.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.react_streaming [questions]
+"""
+import re
+import sys
+import time
+
+from ai_agent_experiments.config import get_configuration
+from ai_agent_experiments.lesson_02_react_pattern import ReaActAgent, known_actions, run_interactive_agent
+from benchmarks.stand_ins import ChatCompletionsHandler, StandInServer
+
+QUESTION = "I have 2 dogs, a border collie and a scottish terrier. What is their combined weight"
+RAMBLING = " ".join(["Observation: the weight is probably about fifty pounds, so I will keep reasoning."] * 8)
+SCRIPT = [
+    "Thought: I should look up the Border Collie.\nAction: average_dog_weight: Border Collie\nPAUSE\n",
+    "Thought: Now the Scottish Terrier.\nAction: average_dog_weight: Scottish Terrier\nPAUSE\n",
+    "Thought: Add them up.\nAction: calculate: 37 + 20\nPAUSE\n",
+    "Answer: Together they weigh 57 lbs",
+]
+
+
+def responder(request: dict) -> str:
+    observations = sum(1 for m in request["messages"] if m["role"] == "user" and m["content"].startswith("Observation"))
+    reply = SCRIPT[min(observations, len(SCRIPT) - 1)]
+    return reply + RAMBLING if "PAUSE" in reply else reply
+
+
+def run_blocking(agent: ReaActAgent, query: str, max_turns: int = 5) -> str:
+    """The previous loop: full completion, then scan every line for an action."""
+    action_re = re.compile(r'Action: (\w+): (.*)$')
+    for _ in range(max_turns):
+        llm_response = agent(query)
+        action_match = next((action_re.match(line) for line in llm_response.split("\n") if action_re.match(line)), None)
+        if not action_match:
+            return llm_response
+        query = f"Observation: {known_actions[action_match.group(1)](action_match.group(2))}"
+
+
+def main(questions: int) -> None:
+    with StandInServer(ChatCompletionsHandler, responder=responder, chunk_delay=0.002) as model_api:
+        config = get_configuration("./config.json")
+        config.azure_open_ai_config.update(api_key="stand-in", azure_endpoint=model_api.url,
+                                           api_version="2024-10-21", model="stand-in")
+
+        start = time.perf_counter()
+        for _ in range(questions):
+            # The previous implementation built a new agent (and HTTP client) for every question
+            agent = ReaActAgent(config)
+            answer = run_blocking(agent, QUESTION)
+        blocking_time = (time.perf_counter() - start) / questions
+        blocking_tokens = agent.usage["completion_tokens"]
+
+        agent = ReaActAgent(config)
+        start = time.perf_counter()
+        for _ in range(questions):
+            streamed_answer = run_interactive_agent(QUESTION, agent=agent)
+        streaming_time = (time.perf_counter() - start) / questions
+
+        assert answer == streamed_answer, (answer, streamed_answer)
+        print(f"{'loop':<12}{'wall s/question':>18}{'completion tokens/question':>30}")
+        print(f"{'blocking':<12}{blocking_time:>18.3f}{blocking_tokens:>30}")
+        print(f"{'streaming':<12}{streaming_time:>18.3f}{agent.last_run_stats['completion_tokens']:>30}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5)
@@ -0,0 +1,61 @@
+"""
+Queries/sec of ResearchAgent.run (one query at a time, untrimmed search payload as before) versus
+run_many (pooled async session, trimmed payload, search for the next query pipelined with the current
+analysis) against local DuckDuckGo and chat completions stand-ins.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.research_agent [queries]
+"""
+import asyncio
+import json
+import sys
+import time
+
+import requests
+
+from ai_agent_experiments import lesson_01_basic_azure_openai as lesson_01
+from ai_agent_experiments.config import get_configuration
+from benchmarks.stand_ins import ChatCompletionsHandler, DuckDuckGoHandler, StandInServer
+
+SEARCH_DELAY = 0.05
+ANSWER = " ".join(["The findings point to steady progress."] * 10)
+
+
+def main(count: int) -> None:
+    prompt_tokens = []
+
+    def responder(request: dict) -> str:
+        prompt_tokens.append(len(json.dumps(request["messages"])) // 4)
+        return ANSWER
+
+    with StandInServer(DuckDuckGoHandler, delay=SEARCH_DELAY) as search_api, \
+            StandInServer(ChatCompletionsHandler, responder=responder, chunk_delay=0.001) as model_api:
+        lesson_01.SEARCH_URL = search_api.url
+        config = get_configuration("./config.json")
+        config.azure_open_ai_config.update(api_key="stand-in", azure_endpoint=model_api.url,
+                                           api_version="2024-10-21", model="stand-in")
+        queries = [f"AI research trend {i}" for i in range(count)]
+
+        # Previous behaviour: a fresh connection per search and the whole payload in the prompt
+        agent = lesson_01.ResearchAgent(config)
+        start = time.perf_counter()
+        for query in queries:
+            raw = requests.get(search_api.url, params={"q": query, "format": "json"}).json()
+            agent.analyze(raw, query)
+        before_qps = count / (time.perf_counter() - start)
+        before_tokens = sum(prompt_tokens) / count
+        prompt_tokens.clear()
+
+        agent = lesson_01.ResearchAgent(config)
+        start = time.perf_counter()
+        asyncio.run(agent.run_many(queries))
+        after_qps = count / (time.perf_counter() - start)
+        after_tokens = sum(prompt_tokens) / count
+
+        print(f"{'':<22}{'queries/sec':>12}{'prompt tokens/query':>22}")
+        print(f"{'run (untrimmed)':<22}{before_qps:>12.1f}{before_tokens:>22.0f}")
+        print(f"{'run_many':<22}{after_qps:>12.1f}{after_tokens:>22.0f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
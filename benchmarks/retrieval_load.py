@@ -0,0 +1,115 @@
+"""
+Load test for tools/retrieval_server.py: QPS and p50/p99 `retrieve` latency at 1, 16 and 128 concurrent
+clients, per-request embedding and search (RETRIEVAL_BATCH_WINDOW_MS=0) versus micro-batching.
+
+The server runs over streamable HTTP on a warm FAISS index of synthetic chunks. Embeddings come from
+the embeddings stand-in, which charges a fixed round trip per request, like a remote deployment.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.retrieval_load [--chunks N] [--calls C]
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from ai_agent_experiments.config import get_configuration
+from ai_agent_experiments.faiss_store import PersistentFaissStore
+from ai_agent_experiments.mcp_streamable_client import MCPStreamableClient
+from benchmarks.mcp_roundtrip import PROJECT_ROOT, _free_port, _wait_for_port
+from benchmarks.stand_ins import EmbeddingsHandler, StandInServer, hashed_embeddings
+
+CLIENT_COUNTS = [1, 16, 128]
+# Clients share this many MCP sessions
+MAX_SESSIONS = 16
+DIMENSION = 512
+EMBEDDING_DELAY = 0.02
+WORDS = [f"{a}{b}" for a in ("ka", "lo", "mi", "ne", "ru", "sa", "to", "vi") for b in ("dan", "mor", "pel", "tis", "xu")]
+
+
+def _text(rng: random.Random) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(12))
+
+
+def build_store(path: str, chunks: int) -> float:
+    """Write a store of `chunks` synthetic chunks to `path`; returns how long loading it back takes."""
+    rng = random.Random(5)
+    config = get_configuration("./config.json")
+    config.faiss_server_config.update(path=path, dimension=DIMENSION)
+    texts = [_text(rng) for _ in range(chunks)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        PersistentFaissStore(config).add_embedding_vectors(hashed_embeddings(texts), texts)
+        start = time.perf_counter()
+        PersistentFaissStore(config)
+    return time.perf_counter() - start
+
+
+async def run_load(port: int, clients: int, calls: int) -> tuple[float, list[float]]:
+    sessions = [MCPStreamableClient(f"retrieval-{i}", f"http://127.0.0.1:{port}/mcp")
+                for i in range(min(clients, MAX_SESSIONS))]
+    for session in sessions:
+        await session.connect()
+    rng = random.Random(clients)
+    queries = [_text(rng) for _ in range(calls)]
+    latencies = []
+    try:
+        await sessions[0].use_tool("retrieve", {"query": queries[0]})
+
+        async def client(index: int) -> None:
+            session = sessions[index % len(sessions)]
+            for query in queries[index::clients]:
+                start = time.perf_counter()
+                await session.use_tool("retrieve", {"query": query, "top_k": 5})
+                latencies.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(i) for i in range(clients)))
+        seconds = time.perf_counter() - start
+    finally:
+        for session in reversed(sessions):
+            await session.disconnect()
+    return len(latencies) / seconds, latencies
+
+
+async def main(chunks: int, calls: int) -> None:
+    with StandInServer(EmbeddingsHandler, delay=EMBEDDING_DELAY, dimension=DIMENSION) as embeddings_api, \
+            tempfile.TemporaryDirectory() as store_dir:
+        load_seconds = build_store(store_dir, chunks)
+        print(f"{chunks} chunks; loading the index from disk takes {load_seconds * 1000:.0f}ms, "
+              f"which every in-process consumer paid before\n")
+        print(f"{'clients':>7}  {'mode':<15}{'QPS':>8}{'p50 ms':>9}{'p99 ms':>9}{'embedding calls':>17}")
+        for clients in CLIENT_COUNTS:
+            for mode, window_ms in (("per-request", "0"), ("micro-batched", "5")):
+                port = _free_port()
+                env = dict(os.environ, PYTHONPATH=PROJECT_ROOT, MCP_LOG_LEVEL="WARNING",
+                           RETRIEVAL_BATCH_WINDOW_MS=window_ms, FAISS_EMBEDDINGS_SAVE_PATH=store_dir,
+                           FAISS_EMBEDDINGS_DIMENSION=str(DIMENSION), AZURE_OPENAI_ENDPOINT=embeddings_api.url,
+                           AZURE_OPENAI_API_KEY="stand-in", AZURE_OPENAI_API_VERSION="2024-10-21")
+                server = subprocess.Popen([sys.executable, "-m", "tools.retrieval_server", "streamable-http",
+                                           str(port)], env=env, stderr=subprocess.DEVNULL)
+                try:
+                    await _wait_for_port(port)
+                    before = embeddings_api.request_count
+                    qps, latencies = await run_load(port, clients, max(calls, clients * 4))
+                    embedding_calls = embeddings_api.request_count - before - 1  # minus the warm-up
+                finally:
+                    server.terminate()
+                    server.wait()
+                percentiles = statistics.quantiles(latencies, n=100)
+                print(f"{clients:>7}  {mode:<15}{qps:>8.0f}{percentiles[49] * 1000:>9.1f}"
+                      f"{percentiles[98] * 1000:>9.1f}{embedding_calls:>17}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--calls", type=int, default=400)
+    options = parser.parse_args()
+    asyncio.run(main(options.chunks, options.calls))
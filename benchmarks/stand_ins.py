@@ -0,0 +1,348 @@
+"""
+Local stand-ins for the external APIs used by the agents, so benchmarks run without network access
+or API keys. Each stand-in is a small HTTP server started on a background thread. Embeddings are
+also available as a plain function, for code that takes an embedder callable.
+"""
+import base64
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+
+def hashed_embeddings(texts: list[str], dim: int = 512) -> np.ndarray:
+    """
+    Offline stand-in for an embeddings deployment: hashed bag-of-words vectors. Deterministic, instant,
+    and good enough to rank texts by word overlap.
+    """
+    vectors = np.zeros((len(texts), dim), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in re.findall(r"[a-z]+", text.lower()):
+            if len(word) > 2:
+                vectors[row, zlib.crc32(word.encode()) % dim] += 1.0
+    return vectors
+
+
+class _StandInHTTPServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address) -> None:
+        # Clients that are killed or time out mid-request are expected in benchmarks; stay quiet
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class StandInServer:
+    """
+    Runs a request handler class on 127.0.0.1 on a free port in a daemon thread. Keyword arguments
+    are set as attributes on the server, where handlers read them as `self.server.<name>`.
+    """
+
+    def __init__(self, handler_class: type[BaseHTTPRequestHandler], **server_attrs) -> None:
+        self.httpd = _StandInHTTPServer(("127.0.0.1", 0), handler_class)
+        self.httpd.daemon_threads = True
+        self.httpd.request_count = 0
+        for name, value in server_attrs.items():
+            setattr(self.httpd, name, value)
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        return self.httpd.request_count
+
+    def __enter__(self) -> "StandInServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _prefix_cache_hit(cache: set, text: str, minimum_chars: int, block_chars: int) -> int:
+    """
+    Characters of the longest prefix of `text` (at least `minimum_chars`, in whole blocks) that an
+    earlier request also started with; every block-aligned prefix of `text` is remembered.
+    """
+    digest = hashlib.sha1(text[:minimum_chars].encode("utf-8"))
+    hit = 0
+    for end in range(minimum_chars, len(text) + 1, block_chars):
+        if end > minimum_chars:
+            digest.update(text[end - block_chars:end].encode("utf-8"))
+        key = digest.copy().digest()
+        if key in cache:
+            hit = end
+        else:
+            cache.add(key)
+    return hit
+
+
+class _QuietHandler(BaseHTTPRequestHandler):
+    # Headers and body go out as separate writes; without TCP_NODELAY, Nagle's algorithm and the
+    # client's delayed ACK add ~40ms to every response
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.server.request_count += 1
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ArxivHandler(_QuietHandler):
+    """
+    Answers arXiv API queries (`/api/query?search_query=...`) with a synthetic Atom feed, after
+    `server.delay` seconds; a query matches `server.total` papers (default 50). Request start times are appended to `server.request_times` if it is set.
+    """
+
+    def do_GET(self) -> None:
+        if getattr(self.server, "request_times", None) is not None:
+            self.server.request_times.append(time.monotonic())
+        time.sleep(getattr(self.server, "delay", 0.0))
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get("search_query", [""])[0]
+        start = int(params.get("start", ["0"])[0])
+        max_results = int(params.get("max_results", ["10"])[0])
+        total = getattr(self.server, "total", 50)
+        entries = "".join(self._entry(query, i) for i in range(start, min(start + max_results, total)))
+        feed = f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/"
+      xmlns:arxiv="http://arxiv.org/schemas/atom">
+  <title>arXiv Query: {escape(query)}</title>
+  <id>http://arxiv.org/api/stand-in</id>
+  <updated>2025-01-01T00:00:00Z</updated>
+  <opensearch:totalResults>{total}</opensearch:totalResults>
+  <opensearch:startIndex>{start}</opensearch:startIndex>
+  <opensearch:itemsPerPage>{max_results}</opensearch:itemsPerPage>
+  {entries}
+</feed>"""
+        self._send(200, feed.encode("utf-8"), "application/atom+xml")
+
+    @staticmethod
+    def _entry(query: str, i: int) -> str:
+        paper_id = f"2501.{zlib.crc32(query.encode()) % 1000:03d}{i:02d}v1"
+        return f"""
+  <entry>
+    <id>http://arxiv.org/abs/{paper_id}</id>
+    <updated>2025-01-0{i % 9 + 1}T00:00:00Z</updated>
+    <published>2025-01-0{i % 9 + 1}T00:00:00Z</published>
+    <title>Stand-in paper {i} about {escape(query)}</title>
+    <summary>A synthetic abstract for result {i} of {escape(query)}.</summary>
+    <author><name>Author {i}</name></author>
+    <link href="http://arxiv.org/abs/{paper_id}" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/{paper_id}" rel="related" type="application/pdf"/>
+    <arxiv:primary_category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>"""
+
+
+class FileHandler(_QuietHandler):
+    """Serves `server.files` (path -> bytes), e.g. PDF fixtures at `/pdf/<paper_id>`."""
+
+    def do_GET(self) -> None:
+        body = self.server.files.get(urlparse(self.path).path)
+        if body is None:
+            self._send(404, b"not found", "text/plain")
+        else:
+            self._send(200, body, "application/pdf")
+
+
+class WikipediaHandler(_QuietHandler):
+    """Answers MediaWiki `action=query&prop=extracts` requests; titles starting with "Missing" do not exist."""
+
+    def do_GET(self) -> None:
+        params = parse_qs(urlparse(self.path).query)
+        titles = params.get("titles", [""])[0].split("|")
+        pages = []
+        for title in titles:
+            if title.startswith("Missing"):
+                pages.append({"title": title, "missing": True})
+            else:
+                pages.append({"title": title, "extract": f"{title} is a stand-in Wikipedia article."})
+        body = json.dumps({"batchcomplete": True, "query": {"pages": pages}}).encode("utf-8")
+        self._send(200, body, "application/json")
+
+
+class ChatCompletionsHandler(_QuietHandler):
+    """
+    Minimal Azure OpenAI chat completions endpoint (`/openai/deployments/<model>/chat/completions`).
+
+    Replies come from `server.responder(request_json) -> str`. Replies are cut at the request's stop
+    sequences and streamed one word per chunk, `server.chunk_delay` seconds apart, to mimic generation.
+    Prompt processing takes `server.prompt_token_delay` seconds per prompt token before the first chunk.
+    Token counts are approximated as four characters per token, counting messages and tool schemas.
+
+    With `server.prefix_cache` set to a set, prompts are cached the way OpenAI does it: a request that
+    starts with the same bytes (tools, then messages) as an earlier one, for at least 1024 tokens, has
+    that prefix reported as `prompt_tokens_details.cached_tokens` in 128-token steps, and only the
+    rest of the prompt takes processing time.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        reply = self.server.responder(request)
+        for stop in request.get("stop") or []:
+            if stop in reply:
+                reply = reply[:reply.index(stop)]
+        words = [word for word in reply.split(" ")]
+        chunks = [word + (" " if i < len(words) - 1 else "") for i, word in enumerate(words)]
+        prompt = (json.dumps(request["tools"]) if request.get("tools") else "") + json.dumps(request.get("messages", []))
+        prompt_tokens = len(prompt) // 4
+        cache = getattr(self.server, "prefix_cache", None)
+        cached_tokens = _prefix_cache_hit(cache, prompt, 1024 * 4, 128 * 4) // 4 if cache is not None else 0
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(chunks),
+                 "total_tokens": prompt_tokens + len(chunks), "prompt_tokens_details": {"cached_tokens": cached_tokens}}
+        base = {"id": "chatcmpl-stand-in", "created": 0, "model": request.get("model", "stand-in")}
+        delay = getattr(self.server, "chunk_delay", 0.0)
+        time.sleep((prompt_tokens - cached_tokens) * getattr(self.server, "prompt_token_delay", 0.0))
+        if not request.get("stream"):
+            time.sleep(delay * len(chunks))
+            body = dict(base, object="chat.completion", usage=usage, choices=[{
+                "index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": reply}}])
+            self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+            return
+
+        self.server.request_count += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for chunk in chunks:
+                time.sleep(delay)
+                self._send_event(dict(base, object="chat.completion.chunk", choices=[{
+                    "index": 0, "finish_reason": None, "delta": {"role": "assistant", "content": chunk}}]))
+            self._send_event(dict(base, object="chat.completion.chunk", choices=[{
+                "index": 0, "finish_reason": "stop", "delta": {}}]))
+            if (request.get("stream_options") or {}).get("include_usage"):
+                self._send_event(dict(base, object="chat.completion.chunk", choices=[], usage=usage))
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # the client closed the stream early
+
+    def _send_event(self, payload: dict) -> None:
+        self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+        self.wfile.flush()
+
+
+class AnthropicMessagesHandler(_QuietHandler):
+    """
+    Minimal Anthropic Messages endpoint (`/v1/messages`, non-streaming) with prompt caching.
+
+    Replies come from `server.responder(request_json) -> str`. The prompt is read as blocks in the
+    order Anthropic caches them (tools, system, messages); the prefix up to each block marked with
+    `cache_control` is a cache entry once it holds at least 1024 tokens. Usage reports tokens read
+    from and written to `server.prompt_cache` (a dict), and only uncached tokens take
+    `server.prompt_token_delay` seconds each. Text is four characters per token, an image
+    `server.image_tokens` (default 1600).
+    """
+
+    def _blocks(self, request: dict) -> list[dict]:
+        system = request.get("system") or []
+        blocks = list(request.get("tools") or [])
+        blocks += [{"type": "text", "text": system}] if isinstance(system, str) else system
+        for message in request["messages"]:
+            content = message["content"]
+            blocks += [{"type": "text", "text": content}] if isinstance(content, str) else content
+        return blocks
+
+    def _tokens(self, block: dict) -> int:
+        if block.get("type") == "image":
+            return getattr(self.server, "image_tokens", 1600)
+        return len(block["text"] if block.get("type") == "text" else json.dumps(block)) // 4
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        reply = self.server.responder(request)
+        cache = self.server.prompt_cache
+        digest, tokens, read, cacheable = hashlib.sha1(), 0, 0, None
+        for block in self._blocks(request):
+            digest.update(json.dumps({k: v for k, v in block.items() if k != "cache_control"}).encode("utf-8"))
+            tokens += self._tokens(block)
+            if "cache_control" in block and tokens >= 1024:
+                key = digest.copy().digest()
+                if key in cache:
+                    read = tokens
+                cacheable = (key, tokens)
+        written = 0
+        if cacheable is not None and cacheable[0] not in cache:
+            cache[cacheable[0]] = cacheable[1]
+            written = cacheable[1] - read
+        output_tokens = len(reply.split())
+        time.sleep((tokens - read) * getattr(self.server, "prompt_token_delay", 0.0)
+                   + output_tokens * getattr(self.server, "chunk_delay", 0.0))
+        body = {"id": "msg_stand_in", "type": "message", "role": "assistant", "model": request["model"],
+                "content": [{"type": "text", "text": reply}], "stop_reason": "end_turn", "stop_sequence": None,
+                "usage": {"input_tokens": tokens - read - written, "output_tokens": output_tokens,
+                          "cache_read_input_tokens": read, "cache_creation_input_tokens": written}}
+        self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+
+
+class EmbeddingsHandler(_QuietHandler):
+    """
+    Azure OpenAI embeddings endpoint (`/openai/deployments/<model>/embeddings`) returning
+    `hashed_embeddings` of `server.dimension` (default 512). Each request takes `server.delay` seconds
+    plus `server.input_delay` seconds per input, to mimic a round trip to the deployment.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self) -> None:
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        inputs = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        time.sleep(getattr(self.server, "delay", 0.0) + getattr(self.server, "input_delay", 0.0) * len(inputs))
+        vectors = hashed_embeddings(inputs, getattr(self.server, "dimension", 512))
+        if request.get("encoding_format") == "base64":
+            data = [base64.b64encode(vector.tobytes()).decode("ascii") for vector in vectors]
+        else:
+            data = vectors.tolist()
+        tokens = sum(len(text) // 4 for text in inputs)
+        body = {"object": "list", "model": request.get("model", "stand-in"),
+                "data": [{"object": "embedding", "index": i, "embedding": embedding} for i, embedding in enumerate(data)],
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+        self._send(200, json.dumps(body).encode("utf-8"), "application/json")
+
+
+class DuckDuckGoHandler(_QuietHandler):
+    """
+    DuckDuckGo Instant Answer API stand-in returning a payload as bulky as the real one (icons, result
+    HTML, many related topics). Responses take `server.delay` seconds.
+    """
+
+    def do_GET(self) -> None:
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        time.sleep(getattr(self.server, "delay", 0.0))
+        related = [{"Text": f"{query} related topic {i}", "FirstURL": f"https://duckduckgo.com/{i}",
+                    "Icon": {"URL": f"/i/{i}.png", "Height": "", "Width": ""},
+                    "Result": f"<a href=\"https://duckduckgo.com/{i}\">{query} related topic {i}</a> " * 3}
+                   for i in range(30)]
+        body = {"Heading": query.title(), "AbstractText": f"{query} is a stand-in abstract. " * 5,
+                "AbstractURL": f"https://en.wikipedia.org/wiki/{query}", "AbstractSource": "Wikipedia",
+                "Image": "/i/abstract.png", "ImageHeight": 200, "ImageWidth": 200, "Entity": "",
+                "Infobox": {"content": [{"label": f"field {i}", "value": "x" * 40} for i in range(20)]},
+                "Answer": "", "Definition": "", "Results": [], "Type": "A",
+                "RelatedTopics": [{"Name": "Group", "Topics": related[10:]}] + related[:10],
+                "meta": {"src_name": "stand-in", "developer": [{"name": "stand-in", "url": "x"}] * 5}}
+        self._send(200, json.dumps(body).encode("utf-8"), "application/json")
@@ -0,0 +1,152 @@
+"""
+Prompt tokens and time to first token of ChatBot turns with every registered tool attached versus the
+ToolRouter's top-k selection, with 5, 50 and 200 tools registered.
+
+Tools are synthetic MCP-style tools with realistic schemas. Embeddings come from an offline
+hashed bag-of-words embedder, so no embeddings deployment is needed. The chat completions stand-in
+charges `PROMPT_TOKEN_DELAY` seconds per prompt token before answering, to mimic prompt processing.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.tool_router
+"""
+import asyncio
+import json
+import os
+import statistics
+import tempfile
+import time
+
+from openai import AsyncAzureOpenAI
+from openai.types import FunctionDefinition
+from openai.types.chat import ChatCompletionFunctionTool
+
+from ai_agent_experiments.config import get_configuration
+from ai_agent_experiments.lesson_04_tool_calling_mcp import ChatBot
+from ai_agent_experiments.tool_router import ToolRouter
+from benchmarks.stand_ins import ChatCompletionsHandler, StandInServer, hashed_embeddings
+
+TOOL_COUNTS = [5, 50, 200]
+TOP_K = 5
+PROMPT_TOKEN_DELAY = 0.00005
+
+# The tools every registry starts with, and a question each one should be picked for
+CORE_TOOLS = {
+    "search_papers": ("Search arXiv for research papers related to a topic", {"topic": "Research topic to search arXiv papers for"}),
+    "extract_info": ("Get the stored title, authors and abstract of an arXiv paper by its id", {"paper_id": "arXiv paper id"}),
+    "index_papers": ("Download paper PDFs and index their text into the vector store for retrieval", {"paper_ids": "arXiv paper ids to index"}),
+    "say_hello": ("Say hello and greet someone by name", {"username": "The name of the person to greet"}),
+    "get_weather": ("Get the current weather forecast for a city", {"city": "City name"}),
+}
+QUESTIONS = {
+    "Find recent research papers on arXiv about retrieval augmented generation": "search_papers",
+    "Who are the authors of arXiv paper 2401.01234 and what is its abstract?": "extract_info",
+    "Please index the PDF text of papers 2401.01234 and 2402.00042 into the vector store": "index_papers",
+    "Greet my colleague Ada by name": "say_hello",
+    "What is the weather forecast in Oslo today?": "get_weather",
+}
+DOMAINS = ["calendar", "invoice", "ticket", "repository", "database", "email", "spreadsheet", "crm contact",
+           "shipment", "inventory", "payroll", "expense report", "playlist", "recipe", "flight booking",
+           "hotel reservation", "support chat", "dashboard", "kubernetes pod", "dns record"]
+ACTIONS = ["create", "update", "delete", "list", "archive", "export", "share", "summarize", "validate", "restore"]
+
+
+def make_tool(name: str, description: str, parameters: dict[str, str]) -> ChatCompletionFunctionTool:
+    schema = {"type": "object", "required": list(parameters),
+              "properties": {param: {"type": "string", "description": text} for param, text in parameters.items()}}
+    return ChatCompletionFunctionTool(type="function", function=FunctionDefinition(
+        name=name, description=description, parameters=schema))
+
+
+def make_tools(count: int) -> list[ChatCompletionFunctionTool]:
+    tools = [make_tool(name, description, params) for name, (description, params) in CORE_TOOLS.items()]
+    for i in range(count - len(tools)):
+        domain, action = DOMAINS[i % len(DOMAINS)], ACTIONS[(i // len(DOMAINS)) % len(ACTIONS)]
+        slug = domain.replace(" ", "_")
+        tools.append(make_tool(
+            f"{action}_{slug}_{i}",
+            f"{action.capitalize()} a {domain} in the connected workspace. Use this when the user asks to "
+            f"{action} {domain} entries; returns the affected {domain} with its identifier and timestamps.",
+            {f"{slug}_id": f"Identifier of the {domain}", "workspace": "Workspace the item belongs to",
+             "fields": f"JSON object with the {domain} fields to apply", "dry_run": "Validate without saving"}))
+    return tools
+
+
+async def offline_embed(texts: list[str]) -> list[list[float]]:
+    return hashed_embeddings(texts).tolist()
+
+
+class StaticTools:
+    """Stands in for an MCP client with a fixed tool list."""
+
+    def __init__(self, tools: list) -> None:
+        self.tools = tools
+
+    async def get_available_tools(self) -> list:
+        return self.tools
+
+    async def use_tool(self, tool_name: str, tool_args: dict) -> str:
+        return ""
+
+
+async def run_turns(bot: ChatBot, sent_tools: list) -> tuple[list[float], float]:
+    first_token = []
+    hits = 0
+    # Warm up connections and the router's tool index
+    async for _ in bot.run_stream(next(iter(QUESTIONS))):
+        pass
+    for question, expected in QUESTIONS.items():
+        bot.messages = bot.messages[:1]
+        start = time.perf_counter()
+        async for _ in bot.run_stream(question):
+            first_token.append(time.perf_counter() - start)
+            break
+        hits += expected in {tool["function"]["name"] for tool in sent_tools[-1]}
+    return first_token, hits / len(QUESTIONS)
+
+
+async def main() -> None:
+    sent_tools = []
+    prompt_tokens = []
+
+    def responder(request: dict) -> str:
+        sent_tools.append(request.get("tools") or [])
+        # Counted the way the stand-in counts usage
+        prompt_tokens.append((len(json.dumps(request["messages"])) + len(json.dumps(sent_tools[-1]))) // 4)
+        return "Done."
+
+    with StandInServer(ChatCompletionsHandler, responder=responder,
+                       prompt_token_delay=PROMPT_TOKEN_DELAY) as model_api, tempfile.TemporaryDirectory() as cache_dir:
+        config = get_configuration("./config.json")
+        config.azure_open_ai_config.update(api_key="stand-in", azure_endpoint=model_api.url,
+                                           api_version="2024-10-21", model="stand-in")
+        client = AsyncAzureOpenAI(api_key="stand-in", azure_endpoint=model_api.url, api_version="2024-10-21")
+        cache_path = os.path.join(cache_dir, "tool_embeddings.db")
+
+        print(f"{'tools':>6}  {'sent':<12}{'prompt tokens':>14}{'first token ms':>16}{'expected tool sent':>20}")
+        for count in TOOL_COUNTS:
+            tools = make_tools(count)
+            for label, router in (("all", None), (f"top {TOP_K}", ToolRouter(offline_embed, top_k=TOP_K,
+                                                                               cache_path=cache_path))):
+                bot = ChatBot(config, client=client, mcp_client=StaticTools(tools), tool_router=router)
+                sent_tools.clear()
+                first_token, hit_rate = await run_turns(bot, sent_tools)
+                tokens = statistics.mean(prompt_tokens[-len(QUESTIONS):])
+                print(f"{count:>6}  {label:<12}{tokens:>14.0f}{statistics.mean(first_token) * 1000:>16.1f}"
+                      f"{hit_rate:>20.0%}")
+
+        # A new router, as after a restart or reconnect, finds every tool embedding in the disk cache
+        tools = make_tools(TOOL_COUNTS[-1])
+        router = ToolRouter(offline_embed, top_k=TOP_K, cache_path=cache_path)
+        await router.select(next(iter(QUESTIONS)), tools)
+        print(f"\nafter restart: {router.embedding_calls} embedding call(s) for {TOOL_COUNTS[-1]} tools "
+              f"(the query only)")
+
+        start = time.perf_counter()
+        for question in QUESTIONS:
+            await router.select(question, tools)
+        print(f"routing overhead per turn ({TOOL_COUNTS[-1]} tools): "
+              f"{(time.perf_counter() - start) / len(QUESTIONS) * 1000:.2f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,44 @@
+"""
+Exercise the Wikipedia page cache used by MyWikiTool against a local Wikipedia API stand-in.
+
+Usage (from the project root):
+    poetry run python -m benchmarks.wiki_cache
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from ai_agent_experiments.wiki_cache import WikiPageCache
+from benchmarks.stand_ins import StandInServer, WikipediaHandler
+
+TITLES = [f"Topic {i}" for i in range(40)] + ["Missing page 1", "Missing page 2"]
+
+
+async def main() -> None:
+    with StandInServer(WikipediaHandler) as wiki_api, tempfile.TemporaryDirectory() as cache_dir:
+        cache = WikiPageCache(os.path.join(cache_dir, "wikipedia.db"), api_url=wiki_api.url)
+
+        start = time.perf_counter()
+        for title in TITLES[:10]:
+            cache.get(title)
+        print(f"10 pages one by one (cold):  {time.perf_counter() - start:.3f}s, {wiki_api.request_count} requests")
+
+        requests_before = wiki_api.request_count
+        start = time.perf_counter()
+        pages = await cache.aget_many(TITLES)
+        print(f"{len(TITLES)} pages batched (10 warm): {time.perf_counter() - start:.3f}s, "
+              f"{wiki_api.request_count - requests_before} requests")
+        assert pages["Missing page 1"] is None
+
+        requests_before = wiki_api.request_count
+        start = time.perf_counter()
+        await cache.aget_many(TITLES)
+        print(f"{len(TITLES)} pages fully cached:   {time.perf_counter() - start:.3f}s, "
+              f"{wiki_api.request_count - requests_before} requests")
+        assert wiki_api.request_count == requests_before, "cached and missing pages must not be re-fetched"
+        print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
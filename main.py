@@ -1,11 +1,12 @@
+import argparse
 import asyncio
 
-from ai_agent_experiments.config import Configuration
+from ai_agent_experiments.config import get_configuration
 from ai_agent_experiments.lesson_04_tool_calling_mcp import ChatBot
 
 
 async def main() -> None:
-    config = Configuration("./config.json")
+    config = get_configuration("./config.json")
     agent = ChatBot(config)
     try:
         await agent.mcp_client.connect()
@@ -33,4 +34,14 @@ async def main() -> None:
 
 
 if __name__ == "__main__":
-   asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Chat with Bot in the terminal, or serve it to many users over HTTP")
+    parser.add_argument("--serve", action="store_true", help="run the multi-session HTTP/WebSocket chat server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    if args.serve:
+        from ai_agent_experiments.chat_server import serve
+
+        asyncio.run(serve(get_configuration("./config.json"), host=args.host, port=args.port))
+    else:
+        asyncio.run(main())
\ No newline at end of file
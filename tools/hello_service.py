@@ -1,4 +1,6 @@
 import asyncio
+import contextlib
+import sys
 
 import mcp
 from mcp import stdio_server
@@ -39,12 +41,34 @@ class HelloService:
         async with stdio_server() as (read_stream, write_stream):
             await self.server.run(read_stream, write_stream, self.server.create_initialization_options())
 
+    async def run_http(self, host: str = "127.0.0.1", port: int = 8000) -> None:
+        """Serve the same tools over streamable HTTP at http://<host>:<port>/mcp/."""
+        import uvicorn
+        from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+        from starlette.applications import Starlette
+        from starlette.routing import Mount
+
+        session_manager = StreamableHTTPSessionManager(app=self.server)
+
+        @contextlib.asynccontextmanager
+        async def lifespan(app: Starlette):
+            async with session_manager.run():
+                yield
+
+        app = Starlette(routes=[Mount("/mcp", app=session_manager.handle_request)], lifespan=lifespan)
+        config = uvicorn.Config(app, host=host, port=port, log_level="warning")
+        await uvicorn.Server(config).serve()
+
 
 if __name__ == "__main__":
+    # python -m tools.hello_service [http [port]]
     async def main() -> None:
         service = HelloService()
-        await service.run()
-        print("Server stopped.")
+        if len(sys.argv) > 1 and sys.argv[1] == "http":
+            await service.run_http(port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000)
+        else:
+            await service.run()
+        print("Server stopped.", file=sys.stderr)
 
 
     asyncio.run(main())
@@ -0,0 +1,158 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    paper_id  TEXT PRIMARY KEY,
+    title     TEXT NOT NULL,
+    authors   TEXT NOT NULL,
+    summary   TEXT NOT NULL,
+    published TEXT NOT NULL,
+    pdf_url   TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paper_topics (
+    topic    TEXT NOT NULL,
+    paper_id TEXT NOT NULL REFERENCES papers(paper_id),
+    PRIMARY KEY (topic, paper_id)
+);
+CREATE TABLE IF NOT EXISTS indexed_pdfs (
+    sha256     TEXT PRIMARY KEY,
+    paper_id   TEXT NOT NULL,
+    chunks     INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_cache (
+    cache_key  TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL,
+    paper_ids  TEXT NOT NULL
+);
+"""
+
+
+class PaperStore:
+    """
+    SQLite store for paper metadata saved by the research server.
+
+    Papers are keyed by their arXiv short id, so lookups are a single primary-key read no matter
+    how many topics have been searched. The database runs in WAL mode so several server processes
+    can write while others read.
+    """
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        self._local = threading.local()
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads; keep one per thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self) -> "_Transaction":
+        return _Transaction(self._connection())
+
+    def upsert_papers(self, topic: str, articles: dict[str, dict]) -> None:
+        """Insert or update `articles` (paper_id -> article dict) and file them under `topic`."""
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO papers (paper_id, title, authors, summary, published, pdf_url) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(paper_id) DO UPDATE SET title=excluded.title, authors=excluded.authors, "
+                "summary=excluded.summary, published=excluded.published, pdf_url=excluded.pdf_url",
+                [(paper_id, a["title"], json.dumps(a["authors"]), a["summary"], a["published"], a["pdf_url"])
+                 for paper_id, a in articles.items()],
+            )
+            conn.executemany("INSERT OR IGNORE INTO paper_topics (topic, paper_id) VALUES (?, ?)",
+                             [(topic, paper_id) for paper_id in articles])
+
+    def get_paper(self, paper_id: str) -> Optional[dict]:
+        """Return the stored article dict for `paper_id`, or None."""
+        row = self._connection().execute(
+            "SELECT title, authors, summary, published, pdf_url FROM papers WHERE paper_id = ?", (paper_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"title": row["title"], "authors": json.loads(row["authors"]), "summary": row["summary"],
+                "published": row["published"], "pdf_url": row["pdf_url"]}
+
+    def topic_paper_ids(self, topic: str) -> list[str]:
+        rows = self._connection().execute(
+            "SELECT paper_id FROM paper_topics WHERE topic = ? ORDER BY paper_id", (topic,)
+        ).fetchall()
+        return [row["paper_id"] for row in rows]
+
+    def get_cached_search(self, cache_key: str, ttl_seconds: float) -> Optional[list[str]]:
+        """Return the paper ids cached for a search, or None if missing or older than `ttl_seconds`."""
+        row = self._connection().execute(
+            "SELECT fetched_at, paper_ids FROM search_cache WHERE cache_key = ?", (cache_key,)
+        ).fetchone()
+        if row is None or time.time() - row["fetched_at"] > ttl_seconds:
+            return None
+        return json.loads(row["paper_ids"])
+
+    def put_cached_search(self, cache_key: str, paper_ids: list[str]) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO search_cache (cache_key, fetched_at, paper_ids) VALUES (?, ?, ?)",
+                         (cache_key, time.time(), json.dumps(paper_ids)))
+
+    def is_pdf_indexed(self, sha256: str) -> bool:
+        """True if a PDF with this content hash has already been added to the vector store."""
+        return self._connection().execute(
+            "SELECT 1 FROM indexed_pdfs WHERE sha256 = ?", (sha256,)
+        ).fetchone() is not None
+
+    def mark_pdf_indexed(self, sha256: str, paper_id: str, chunks: int) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO indexed_pdfs (sha256, paper_id, chunks, indexed_at) VALUES (?, ?, ?, ?)",
+                         (sha256, paper_id, chunks, time.time()))
+
+    def is_empty(self) -> bool:
+        return self._connection().execute("SELECT 1 FROM papers LIMIT 1").fetchone() is None
+
+    def migrate_directory(self, paper_dir: str, load_papers_info) -> int:
+        """
+        Import the legacy `<paper_dir>/<topic>/papers_info.json` layout. Returns the number of papers
+        imported. `load_papers_info` reads one JSON file and returns {} on errors.
+        """
+        imported = 0
+        if not os.path.isdir(paper_dir):
+            return imported
+        for topic in sorted(os.listdir(paper_dir)):
+            file_path = os.path.join(paper_dir, topic, "papers_info.json")
+            if os.path.isfile(file_path):
+                papers_info = load_papers_info(file_path)
+                self.upsert_papers(topic, papers_info)
+                imported += len(papers_info)
+        return imported
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _Transaction:
+    """Context manager running a block in a BEGIN IMMEDIATE transaction so concurrent writers queue up."""
+
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
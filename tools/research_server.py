@@ -1,14 +1,37 @@
+import asyncio
+import functools
+import hashlib
 import json
 import os
-from typing import List
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Awaitable, Callable, List
 
-import arxiv
 from mcp.server import FastMCP
+from mcp.server.fastmcp import Context
 from dataclasses import asdict, dataclass
 from typing import Optional
 
+from ai_agent_experiments.config import get_configuration
+from tools.paper_store import PaperStore
+
 PAPER_DIR = "papers"
-mcp = FastMCP("research")
+PAPER_DB = os.path.join(PAPER_DIR, "papers.db")
+# Point ARXIV_API_URL at a local stand-in to run without network access
+# Blank values in .env (KEY=) fall back to the defaults, hence `or` rather than a getenv default
+ARXIV_API_URL = os.getenv("ARXIV_API_URL") or "https://export.arxiv.org/api/query"
+SEARCH_CACHE_TTL = float(os.getenv("ARXIV_CACHE_TTL_SECONDS") or 24 * 60 * 60)
+# arXiv asks API clients to make no more than one request every three seconds
+ARXIV_MIN_INTERVAL = float(os.getenv("ARXIV_MIN_INTERVAL_SECONDS") or 3)
+_SORT_CRITERIA = {"relevance": "Relevance", "submitted": "SubmittedDate", "updated": "LastUpdatedDate"}
+# Used for papers that search_papers has not saved yet
+ARXIV_PDF_URL = os.getenv("ARXIV_PDF_URL") or "https://arxiv.org/pdf"
+PDF_FETCH_CONCURRENCY = int(os.getenv("PDF_FETCH_CONCURRENCY") or 4)
+EMBEDDING_BATCH_SIZE = 64
+mcp = FastMCP("research", log_level=os.getenv("MCP_LOG_LEVEL") or "INFO")
+_store: Optional[PaperStore] = None
 
 @dataclass
 class SearchResult:
@@ -36,36 +59,78 @@ def _load_papers_info(file_path: str) -> dict:
     except (FileNotFoundError, json.JSONDecodeError):
         return {}
 
-def _save_papers_info(file_path: str, data: dict) -> None:
-    with open(file_path, "w") as json_file:
-        json.dump(data, json_file, indent=2)
+def _get_store() -> PaperStore:
+    """Open the paper store, importing any papers saved in the old per-topic JSON layout on first use."""
+    global _store
+    if _store is None:
+        _store = PaperStore(PAPER_DB)
+        if _store.is_empty():
+            migrated = _store.migrate_directory(PAPER_DIR, _load_papers_info)
+            if migrated:
+                print(f"Migrated {migrated} papers from {PAPER_DIR}/*/papers_info.json into {PAPER_DB}", file=sys.stderr)
+    return _store
 
-@mcp.tool(name="search_papers", description="Search for papers related to a topic")
-def search_papers(topic: str, max_results: int = 5) -> SearchResults:
-    client = arxiv.Client()
-
-    search = arxiv.Search(query=topic, max_results=max_results, sort_by=arxiv.SortCriterion.Relevance)
-    papers = client.results(search)
-    # Create a directory for this topic
-    path = os.path.join(PAPER_DIR, topic.lower().replace(" ", "_"))
-    os.makedirs(path, exist_ok=True)
-
-    file_path = os.path.join(path, "papers_info.json")
-
-    # Try to load existing papers info
-    papers_info=_load_papers_info(file_path)
-
-    # Process each paper and add to papers_info
-    results: List[SearchResult]=[]
-    for paper in papers:
-        paper_id=paper.get_short_id()
-        results.append(
-            SearchResult(
-                paper_id=paper_id,
-                title=paper.title,
-                published=str(paper.published.date()),
-            )
-        ) # Build the full "article" to persist
+class _RateLimiter:
+    """
+    Spaces out request starts by at least `min_interval` seconds across all concurrent searches.
+    Called from the worker threads the arxiv client runs in, before every page and every retry.
+    """
+
+    def __init__(self, min_interval: float) -> None:
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_start = 0.0
+
+    def wait(self) -> None:
+        # Claim the next free start slot, then sleep until it without holding the lock
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.min_interval
+        time.sleep(start - now)
+
+
+_rate_limiter = _RateLimiter(ARXIV_MIN_INTERVAL)
+_inflight: dict[str, asyncio.Future] = {}
+
+
+@functools.cache
+def _get_arxiv_client():
+    """Shared arxiv client; its requests session keeps connections to the API open between searches."""
+    # arxiv (and its feedparser/requests stack) is only needed once a search is made
+    import arxiv
+
+    import requests
+
+    class PacedAdapter(requests.adapters.HTTPAdapter):
+        def send(self, request, **kwargs):
+            # Every HTTP request the client makes (each page and each retry) passes through here; pacing
+            # them with _rate_limiter rather than the client's own delay_seconds makes concurrent searches
+            # share one budget
+            _rate_limiter.wait()
+            return super().send(request, **kwargs)
+
+    client = arxiv.Client(page_size=100, delay_seconds=0, num_retries=3)
+    session = getattr(client, "_session", None)
+    if not isinstance(session, requests.Session):
+        # Fail loudly rather than search unpaced if a future arxiv release stops using a requests session
+        raise RuntimeError("arxiv.Client has no requests session to rate-limit")
+    adapter = PacedAdapter()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    client.query_url_format = ARXIV_API_URL + "?{}"
+    return client
+
+
+def _fetch_articles(topic: str, max_results: int, sort_by: str) -> dict[str, dict]:
+    import arxiv
+
+    search = arxiv.Search(query=topic, max_results=max_results,
+                          sort_by=getattr(arxiv.SortCriterion, _SORT_CRITERIA[sort_by]))
+    # Process each paper and collect the new or updated articles for this topic
+    papers_info = {}
+    for paper in _get_arxiv_client().results(search):
+        # Build the full "article" to persist
         article = Article(
             title=paper.title,
             authors=[author.name for author in paper.authors],
@@ -73,22 +138,71 @@ def search_papers(topic: str, max_results: int = 5) -> SearchResults:
             pdf_url=paper.pdf_url,
             published=str(paper.published.date()),
         )
-        papers_info[paper_id] = asdict(article)
-
-    # Save updated papers_info to JSON file
-    with open(file_path, "w") as json_file:
-        json.dump(papers_info, json_file, indent=2)
+        papers_info[paper.get_short_id()] = asdict(article)
+    return papers_info
 
-    print(f"Results are saved in: {file_path}")
 
+def _results_from_store(paper_ids: List[str]) -> SearchResults:
+    store = _get_store()
+    results: List[SearchResult] = []
+    for paper_id in paper_ids:
+        article = store.get_paper(paper_id)
+        if article is not None:
+            results.append(SearchResult(paper_id=paper_id, title=article["title"], published=article["published"]))
     return SearchResults(results=results, total=len(results))
 
 
+async def _search(topic: str, max_results: int, sort_by: str) -> SearchResults:
+    if sort_by not in _SORT_CRITERIA:
+        raise ValueError(f"sort_by must be one of {sorted(_SORT_CRITERIA)}")
+    topic_key = topic.strip().lower().replace(" ", "_")
+    cache_key = json.dumps([topic_key, max_results, sort_by])
+    store = _get_store()
+
+    cached = store.get_cached_search(cache_key, SEARCH_CACHE_TTL)
+    if cached is not None:
+        return _results_from_store(cached)
+    # Identical searches already running share one fetch
+    if cache_key in _inflight:
+        return await asyncio.shield(_inflight[cache_key])
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        # The arxiv client is synchronous and paces its own requests; run it off the event loop so the
+        # server keeps serving
+        papers_info = await asyncio.to_thread(_fetch_articles, topic, max_results, sort_by)
+        # Upsert only the papers returned by this search
+        store.upsert_papers(topic_key, papers_info)
+        store.put_cached_search(cache_key, list(papers_info))
+        print(f"Results are saved in: {PAPER_DB}", file=sys.stderr)
+        results = _results_from_store(list(papers_info))
+        future.set_result(results)
+        return results
+    except BaseException as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else is waiting
+        raise
+    finally:
+        del _inflight[cache_key]
+
+
+@mcp.tool(name="search_papers", description="Search for papers related to a topic")
+async def search_papers(topic: str, max_results: int = 5, sort_by: str = "relevance") -> SearchResults:
+    return await _search(topic, max_results, sort_by)
+
+
+@mcp.tool(name="search_papers_many", description="Search for papers on several topics at once")
+async def search_papers_many(topics: List[str], max_results: int = 5,
+                             sort_by: str = "relevance") -> dict[str, SearchResults]:
+    results = await asyncio.gather(*(_search(topic, max_results, sort_by) for topic in topics))
+    return dict(zip(topics, results))
+
 
 @mcp.tool()
 def extract_info(paper_id: str) -> str:
     """
-        Search for information about a specific paper across all topic directories.
+        Look up information about a specific paper saved by search_papers.
 
         Args:
             paper_id: The ID of the paper to look for
@@ -97,22 +211,148 @@ def extract_info(paper_id: str) -> str:
             JSON string with paper information if found, error message if not found
         """
 
-    for item in os.listdir(PAPER_DIR):
-        item_path = os.path.join(PAPER_DIR, item)
-        if os.path.isdir(item_path):
-            file_path = os.path.join(item_path, "papers_info.json")
-            if os.path.isfile(file_path):
-                try:
-                    with open(file_path, "r") as json_file:
-                        papers_info = json.load(json_file)
-                        if paper_id in papers_info:
-                            return json.dumps(papers_info[paper_id], indent=2)
-                except (FileNotFoundError, json.JSONDecodeError) as e:
-                    print(f"Error reading {file_path}: {str(e)}")
-                    continue
+    article = _get_store().get_paper(paper_id)
+    if article is not None:
+        return json.dumps(article, indent=2)
 
     return f"There's no saved information related to paper {paper_id}."
 
 
+def _chunk_text(text: str, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Split text into windows of `chunk_size` characters that overlap by `chunk_overlap`."""
+    text = " ".join(text.split())
+    step = max(1, chunk_size - chunk_overlap)
+    chunks = []
+    for start in range(0, len(text), step):
+        chunks.append(text[start:start + chunk_size])
+        if start + chunk_size >= len(text):
+            break
+    return chunks
+
+
+def _extract_chunks(pdf_bytes: bytes, chunk_size: int, chunk_overlap: int) -> List[str]:
+    """Runs in a worker process: PyMuPDF parsing is CPU-bound and holds the GIL."""
+    import fitz
+
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+        text = "".join(page.get_text() for page in doc)
+    return _chunk_text(text, chunk_size, chunk_overlap)
+
+
+@functools.cache
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=os.cpu_count())
+
+
+@functools.cache
+def _get_faiss_store():
+    from ai_agent_experiments.faiss_store import PersistentFaissStore
+
+    return PersistentFaissStore(get_configuration("./config.json"))
+
+
+@functools.cache
+def _get_embedding_client():
+    from openai import AsyncAzureOpenAI
+
+    config = get_configuration("./config.json")
+    return AsyncAzureOpenAI(api_key=config.azure_open_ai_config["api_key"],
+                            azure_endpoint=config.azure_open_ai_config["azure_endpoint"],
+                            api_version=config.azure_open_ai_config["api_version"])
+
+
+async def _azure_embed(texts: List[str]) -> List[List[float]]:
+    model = get_configuration("./config.json").faiss_server_config["embedding_model"]
+    response = await _get_embedding_client().embeddings.create(input=texts, model=model)
+    return [item.embedding for item in response.data]
+
+
+async def _download_pdf(http, url: str) -> tuple[bytes, str]:
+    """Return (pdf bytes, sha256 hex digest), hashing while the body streams in."""
+    digest = hashlib.sha256()
+    body = bytearray()
+    async with http.stream("GET", url) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            digest.update(chunk)
+            body.extend(chunk)
+    return bytes(body), digest.hexdigest()
+
+
+async def _index_papers(paper_ids: List[str],
+                        embed: Callable[[List[str]], Awaitable[List[List[float]]]] = _azure_embed,
+                        report: Optional[Callable[[int, int], Awaitable[None]]] = None) -> dict:
+    import httpx
+
+    store = _get_store()
+    faiss_config = get_configuration("./config.json").faiss_server_config
+    paper_ids = list(dict.fromkeys(paper_ids))
+    summary = {"indexed": [], "skipped": [], "failed": {}, "chunks": 0}
+    seen_digests = set()
+    faiss_lock = asyncio.Lock()
+    fetch_slots = asyncio.Semaphore(PDF_FETCH_CONCURRENCY)
+    loop = asyncio.get_running_loop()
+    done = 0
+
+    async def index_one(http, paper_id: str) -> None:
+        nonlocal done
+        try:
+            article = store.get_paper(paper_id)
+            pdf_url = article["pdf_url"] if article else f"{ARXIV_PDF_URL}/{paper_id}"
+            async with fetch_slots:
+                pdf_bytes, digest = await _download_pdf(http, pdf_url)
+            if digest in seen_digests or store.is_pdf_indexed(digest):
+                summary["skipped"].append(paper_id)
+                return
+            seen_digests.add(digest)
+            chunks = await loop.run_in_executor(_get_pdf_pool(), _extract_chunks, pdf_bytes,
+                                                faiss_config["chunk_size"], faiss_config["chunk_overlap"])
+            vectors = []
+            for i in range(0, len(chunks), EMBEDDING_BATCH_SIZE):
+                vectors.extend(await embed(chunks[i:i + EMBEDDING_BATCH_SIZE]))
+            metadata = [{"paper_id": paper_id, "chunk": i} for i in range(len(chunks))]
+            # The FAISS store is not thread-safe and saves itself after every add
+            async with faiss_lock:
+                if chunks:
+                    await asyncio.to_thread(_get_faiss_store().add_embedding_vectors, vectors, chunks, metadata)
+            store.mark_pdf_indexed(digest, paper_id, len(chunks))
+            summary["indexed"].append(paper_id)
+            summary["chunks"] += len(chunks)
+        except Exception as e:
+            summary["failed"][paper_id] = str(e)
+        finally:
+            done += 1
+            if report is not None:
+                await report(done, len(paper_ids))
+
+    async with httpx.AsyncClient(follow_redirects=True, timeout=60.0,
+                                 limits=httpx.Limits(max_connections=PDF_FETCH_CONCURRENCY)) as http:
+        await asyncio.gather(*(index_one(http, paper_id) for paper_id in paper_ids))
+    return summary
+
+
+@mcp.tool(name="index_papers",
+          description="Download the PDFs of papers and index their full text in the vector store for retrieval")
+async def index_papers(paper_ids: List[str], ctx: Context) -> dict:
+    """
+        Fetch, parse, chunk and embed the PDFs of the given papers. PDFs whose content was already
+        indexed are skipped.
+
+        Args:
+            paper_ids: IDs of the papers to index
+
+        Returns:
+            Dict with the indexed, skipped and failed paper IDs and the number of chunks added
+        """
+
+    async def report(done: int, total: int) -> None:
+        await ctx.report_progress(done, total)
+
+    return await _index_papers(paper_ids, report=report)
+
+
 if __name__ == "__main__":
-    mcp.run(transport='stdio')
+    # python -m tools.research_server [stdio|streamable-http [port]]
+    if len(sys.argv) > 2:
+        mcp.settings.port = int(sys.argv[2])
+    mcp.run(transport=sys.argv[1] if len(sys.argv) > 1 else 'stdio')
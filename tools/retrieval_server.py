@@ -0,0 +1,144 @@
+import asyncio
+import contextlib
+import functools
+import os
+import sys
+from dataclasses import dataclass
+from typing import Awaitable, Callable, List, Optional
+
+from mcp.server import FastMCP
+
+from ai_agent_experiments.config import get_configuration
+
+# Requests arriving within this window of the first pending one share an embeddings call and an index
+# search; 0 embeds and searches every request on its own. Blank values in .env (KEY=) mean the default
+BATCH_WINDOW = float(os.getenv("RETRIEVAL_BATCH_WINDOW_MS") or 5) / 1000
+MAX_BATCH_SIZE = int(os.getenv("RETRIEVAL_MAX_BATCH_SIZE") or 64)
+mcp = FastMCP("retrieval", log_level=os.getenv("MCP_LOG_LEVEL") or "INFO")
+
+
+@dataclass
+class RetrievedChunk:
+    chunk: str
+    score: float
+    metadata: dict
+
+
+@functools.cache
+def _get_store():
+    from ai_agent_experiments.faiss_store import PersistentFaissStore
+
+    # The store reports loading on stdout, which is the protocol channel under the stdio transport
+    with contextlib.redirect_stdout(sys.stderr):
+        return PersistentFaissStore(get_configuration("./config.json"))
+
+
+@functools.cache
+def _get_embedding_client():
+    from openai import AsyncAzureOpenAI
+
+    config = get_configuration("./config.json")
+    return AsyncAzureOpenAI(api_key=config.azure_open_ai_config["api_key"],
+                            azure_endpoint=config.azure_open_ai_config["azure_endpoint"],
+                            api_version=config.azure_open_ai_config["api_version"])
+
+
+async def _azure_embed(texts: List[str]) -> List[List[float]]:
+    model = get_configuration("./config.json").faiss_server_config["embedding_model"]
+    response = await _get_embedding_client().embeddings.create(input=texts, model=model)
+    return [item.embedding for item in response.data]
+
+
+def _search_store(vectors: List[List[float]], top_k: int) -> List[List[dict]]:
+    return _get_store().search_many(vectors, top_k)
+
+
+class _MicroBatcher:
+    """
+    Coalesces retrieve requests into batches: the first pending request starts a `window` second
+    timer, and everything queued when it fires (or once `max_batch` queries are waiting) is embedded
+    in one call and searched with one index search. Identical queries in a batch are embedded once.
+    """
+
+    def __init__(self, embed: Callable[[List[str]], Awaitable[List[List[float]]]],
+                 search: Callable[[List[List[float]], int], List[List[dict]]],
+                 window: float = BATCH_WINDOW, max_batch: int = MAX_BATCH_SIZE) -> None:
+        self.embed = embed
+        self.search = search
+        self.window = window
+        self.max_batch = max_batch
+        self._pending: list[tuple[str, int, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._running: set[asyncio.Task] = set()
+
+    async def retrieve(self, query: str, top_k: int) -> List[dict]:
+        if self.window <= 0:
+            return (await self._run([(query, top_k)]))[0]
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((query, top_k, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        task = asyncio.create_task(self._resolve(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _resolve(self, batch: list[tuple[str, int, asyncio.Future]]) -> None:
+        try:
+            results = await self._run([(query, top_k) for query, top_k, _ in batch])
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, _, future), result in zip(batch, results):
+            # Callers that gave up (cancelled) have a finished future already
+            if not future.done():
+                future.set_result(result)
+
+    async def _run(self, requests: list[tuple[str, int]]) -> List[List[dict]]:
+        texts = list(dict.fromkeys(query for query, _ in requests))
+        vectors = await self.embed(texts)
+        # FAISS releases the GIL while searching, so the event loop keeps accepting requests
+        rows = await asyncio.to_thread(self.search, vectors, max(top_k for _, top_k in requests))
+        by_text = dict(zip(texts, rows))
+        return [by_text[query][:top_k] for query, top_k in requests]
+
+
+_batcher = _MicroBatcher(_azure_embed, _search_store)
+
+
+def _to_chunks(results: List[dict]) -> List[RetrievedChunk]:
+    return [RetrievedChunk(chunk=result["chunk"], score=float(result["score"]), metadata=result["metadata"])
+            for result in results]
+
+
+@mcp.tool(name="retrieve",
+          description="Find the indexed text chunks closest to a query; lower scores are closer matches")
+async def retrieve(query: str, top_k: int = 3) -> List[RetrievedChunk]:
+    return _to_chunks(await _batcher.retrieve(query, top_k))
+
+
+@mcp.tool(name="retrieve_many",
+          description="Find the indexed text chunks closest to each of several queries at once")
+async def retrieve_many(queries: List[str], top_k: int = 3) -> dict[str, List[RetrievedChunk]]:
+    results = await asyncio.gather(*(_batcher.retrieve(query, top_k) for query in queries))
+    return {query: _to_chunks(result) for query, result in zip(queries, results)}
+
+
+if __name__ == "__main__":
+    # python -m tools.retrieval_server [stdio|streamable-http [port]]
+    # Load the index before accepting requests so the first caller does not pay for it
+    _get_store()
+    if len(sys.argv) > 2:
+        mcp.settings.port = int(sys.argv[2])
+    mcp.run(transport=sys.argv[1] if len(sys.argv) > 1 else 'stdio')